@@ -0,0 +1,6 @@
+import sys
+from solver.endgame import main
+
+#Builds the endgame tables probed by the solvers. Eg: python build_tables.py KQvK KRvK KQvKQ
+if __name__ == "__main__":
+    sys.exit(main())
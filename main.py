@@ -3,55 +3,53 @@ import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'  # Hides welcome message of pygame
 import pygame
 import sys
-from collections import deque
-import time
-from move import Move
 from board import Board
-import chess
-
-pygame.init() #initialise the pygame environment
+from solver import parse_file
+from solver import EndgameTables
+from solver.cache import DEFAULT_CACHE_PATH
+from solver.endgame import DEFAULT_TABLES_PATH
+from worker import SolveWorker
 
 #Constants for drawing the screen and gaps
 WIDTH = 700
 HEIGHT = 700
 GAP = 25
 
-#pygame initalization and global variables
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Chess Puzzle Solver")
-clock = pygame.time.Clock()
-font = pygame.font.SysFont('Comic Sans MS', 20)
-minimax_text_button = font.render('Minimax', True, COLOUR_NAMES["BLACK"])
-minimax_with_AB_text_button = font.render('Minimax (AB)', True, COLOUR_NAMES["BLACK"])
-DFS_text_button = font.render('DFS', True, COLOUR_NAMES["BLACK"])
-BFS_text_button = font.render('BFS', True, COLOUR_NAMES["BLACK"])
-reset_text_button = font.render('Reset', True, COLOUR_NAMES["BLACK"])
-move_set_calculated = None
+#pygame objects, created by init_display when the GUI starts (not at import time)
+screen = None
+clock = None
+font = None
+small_font = None
+minimax_text_button = None
+minimax_with_AB_text_button = None
+DFS_text_button = None
+BFS_text_button = None
+PNS_text_button = None
+reset_text_button = None
+cancel_text_button = None
 current_player = None
-move_index = None
-duration = False   
-original_fen = None
-
-# ______________________________Checkmate checker_________________________________________
+profiling = False  # Run the next solves under cProfile (toggled with 'p')
+
+def init_display():
+    #initialise the pygame environment, the window and the button texts
+    global screen, clock, font, small_font
+    global minimax_text_button, minimax_with_AB_text_button, DFS_text_button, BFS_text_button, PNS_text_button, reset_text_button, cancel_text_button
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Chess Puzzle Solver")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont('Comic Sans MS', 20)
+    small_font = pygame.font.SysFont('Comic Sans MS', 14)
+    minimax_text_button = font.render('Minimax', True, COLOUR_NAMES["BLACK"])
+    minimax_with_AB_text_button = font.render('Minimax (AB)', True, COLOUR_NAMES["BLACK"])
+    DFS_text_button = font.render('DFS', True, COLOUR_NAMES["BLACK"])
+    BFS_text_button = font.render('BFS', True, COLOUR_NAMES["BLACK"])
+    PNS_text_button = font.render('PNS', True, COLOUR_NAMES["BLACK"])
+    reset_text_button = font.render('Reset', True, COLOUR_NAMES["BLACK"])
+    cancel_text_button = font.render('Cancel', True, COLOUR_NAMES["BLACK"])
+
+# ______________________________Solution display_________________________________________
 
-def check_game_over(board, player):
-    #Check if checkmate or stalemate
-    possible_moves = board.generate_possible_moves(player)
-    
-    original_position_fen = board.generate_fen()
-        
-    board_1 = chess.Board(original_position_fen + " " + player)
-    legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-    possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-    
-    
-    #print(board.pieces) -- for debugging
-    #print(king_in_check) -- for debugging
-    if not possible_moves and board.king_in_check:
-        return True
-    else:
-        return False 
-    
 def display_moves(board, moves):
     count_pos_x = 550
     count_pos_y = 100
@@ -63,8 +61,8 @@ def display_moves(board, moves):
     move_offset_x = 70  # Horizontal offset between columns
 
     board.draw_board()  # Draw board before displaying moves
-    for piece in board.pieces:
-        piece.draw(screen)
+    board.update_sprites()  # The solution has been played on the board
+    board.draw_pieces()
     pygame.display.flip()
 
     # Display move count
@@ -82,486 +80,71 @@ def display_moves(board, moves):
     pygame.display.update()  # Update the display after rendering all moves
     return move_set
 
-# ______________________________Search algorithms_________________________________________
-
-def get_best_move(board, max_depth, player):
-    #manage the minimax algorithm and return the best sequence of moves
-    global move_index
-    global move_set_calculated
-    
-    max_depth = max_depth + max_depth - 1
-    move_index = max_depth
-    
-    if move_set_calculated == None:
-        best_sequence = None
-        moves = []
-        best_score = float("-inf")
-        
-        possible_moves = board.generate_possible_moves(player)
-        
-        original_position_fen = board.generate_fen()
-        
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        row_pieces = []
-        board_line = original_position_fen.strip()
-        ranks = board_line.split("/")
-        for rank in ranks:
-            split_strings = [char for char in rank]
-            row_pieces.append(split_strings)
-        
-        for move in possible_moves:
-            piece, square_to = move
-            board.update(piece, square_to)
-            score, sequence = minimax(board, 1, False, max_depth, player, current_sequence=[move])  # Pass first move in the sequence
-            board.add_pieces(row_pieces)
-            if score > best_score:
-                best_score = score
-                best_sequence = sequence
-        print(best_sequence)
-        
-        for move in best_sequence:
-            piece, square_to = move
-            if square_to in board.occupied_squares:
-                if piece.piece_type == "p" or piece.piece_type == "P":
-                    move_obj = Move(piece, square_to.x, square_to.y, piece.square.x, iscapture=True)
-                else:
-                    move_obj = Move(piece, square_to.x, square_to.y, iscapture=True)
-            else:
-                move_obj = Move(piece, square_to.x, square_to.y)
-            board.update(piece, square_to)
-            moves.append(move_obj)
-            
-        move_set_calculated = display_moves(board, moves)
-        return move_set_calculated
-    else:
-        return move_set_calculated
-
-def minimax(board, depth, isMaximising, max_depth, player, current_sequence=[]):
-    # The minimax algoirithm
-    if depth >= max_depth:
-        if current_player == "w":
-            player = "b"
-        else:
-            player = "w"
-
-        if check_game_over(board, player):
-            return 100, current_sequence
-        else:
-            return -100, current_sequence
-        
-    original_position_fen = board.generate_fen()
-    row_pieces = []
-    board_line = original_position_fen.strip()
-    ranks = board_line.split("/")
-    for rank in ranks:
-        split_strings = [char for char in rank]
-        row_pieces.append(split_strings)
-            
-    if isMaximising:
-        best_score = float("-inf")
-        best_sequence = None
-        if current_player == "w":
-            player = "w"
-        else:
-            player = "b"
-        
-        possible_moves = board.generate_possible_moves(player)
-                
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        for move in possible_moves:
-            piece, square_to = move
-            #Vital area: update move, recursively call minimax with the new board state and player, and undo the move once returned
-            board.update(piece, square_to)
-            score, sequence = minimax(board, depth + 1, False, max_depth, player, current_sequence + [move])
-            board.add_pieces(row_pieces)
-            if score > best_score:
-                best_score = score
-                best_sequence = sequence
-        return best_score, best_sequence
-    
-    else:
-        best_score = float("inf")
-        best_sequence = None
-        if current_player == "w":
-            player = "b"
-        else:
-            player = "w"
-            
-        possible_moves = board.generate_possible_moves(player)
-                
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        for move in possible_moves:
-            piece, square_to = move
-            #Vital area: update move, recursively call minimax with the new board state and player, and undo the move once returned
-            board.update(piece, square_to)
-            score, sequence = minimax(board, depth + 1, True, max_depth, player, current_sequence + [move])
-            board.add_pieces(row_pieces)
-            if score < best_score:
-                best_score = score
-                best_sequence = sequence
-        return best_score, best_sequence
-    
-def get_best_move_with_AB(board, max_depth, player):
-    #Manages the minimax algorithm that has alpha beta pruning 
-    global move_index
-    global move_set_calculated
-    max_depth = max_depth + max_depth - 1
-    move_index = max_depth
-    
-    if move_set_calculated == None:
-        best_sequence = None
-        moves = []
-        best_score = float("-inf")
-        
-        possible_moves = board.generate_possible_moves(player)
-    
-        original_position_fen = board.generate_fen()
-                          
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-    
-        row_pieces = []
-        board_line = original_position_fen.strip()
-        ranks = board_line.split("/")
-        for rank in ranks:
-            split_strings = [char for char in rank]
-            row_pieces.append(split_strings)
-            
-        for move in possible_moves:
-            piece, square_to = move
-            board.update(piece, square_to)
-            score, sequence = minimax_with_AB(board, 1, False, max_depth, player, float("-inf"), float("inf"), current_sequence=[move])  # Pass first move in the sequence
-            board.add_pieces(row_pieces)
-            if score > best_score:
-                best_score = score
-                best_sequence = sequence
-        print(best_sequence)
-        
-        for move in best_sequence:
-            piece, square_to = move
-            if square_to in board.occupied_squares:
-                if piece.piece_type == "p" or piece.piece_type == "P":
-                    move_obj = Move(piece, square_to.x, square_to.y, piece.square.x, iscapture=True)
-                else:
-                    move_obj = Move(piece, square_to.x, square_to.y, iscapture=True)
-            else:
-                move_obj = Move(piece, square_to.x, square_to.y)
-            board.update(piece, square_to)
-            moves.append(move_obj)
-            
-        move_set_calculated = display_moves(board, moves)
-        return move_set_calculated
-    else:
-        return move_set_calculated
-
-def minimax_with_AB(board, depth, isMaximising, max_depth, player, alpha, beta, current_sequence=[]):
-    #Minimax with alpha beta pruning
-    if depth >= max_depth:
-        if current_player == "w":
-            player = "b"
-        else:
-            player = "w"
-
-        if check_game_over(board, player):
-            return 100, current_sequence
-        else:
-            return -100, current_sequence
-        
-    original_position_fen = board.generate_fen()
-    row_pieces = []
-    board_line = original_position_fen.strip()
-    ranks = board_line.split("/")
-    for rank in ranks:
-        split_strings = [char for char in rank]
-        row_pieces.append(split_strings)
+def display_stats(stats, x, y):
+    #Shows the search statistics in the sidebar, one line each from (x, y) down
+    lines = [
+        f"Nodes: {stats.nodes}",
+        f"Nodes/s: {round(stats.nodes_per_second)}",
+        f"Branching: {round(stats.branching_factor, 2)}",
+        f"Cutoffs: {stats.cutoffs}",
+        f"TT hits: {stats.table_hits}",
+        f"Endgame hits: {stats.endgame_hits}",
+    ]
+    for phase, seconds in sorted(stats.phase_times.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"{phase}: {round(seconds, 3)}s")
+    for i, line in enumerate(lines):
+        screen.blit(small_font.render(line, True, COLOUR_NAMES["BLACK"]), (x, y + i * 18))
+
+def display_progress(worker):
+    #Shows the running search in the sidebar: the algorithm, nodes and time so far, the best line found yet and the Cancel button
+    x = 550
+    y = 100
+    lines = [
+        "Searching: " + worker.algorithm,
+        f"Nodes: {worker.nodes}",
+        f"Time: {round(worker.elapsed, 1)}s",
+    ]
+    best_line = worker.best_line
+    if best_line:
+        lines.append("Best line:")
+        moves = [worker.board.move_uci(move) for move in best_line]
+        for i in range(0, len(moves), 2):
+            lines.append("  " + " ".join(moves[i:i + 2]))
+    elif worker.algorithm in ("DFS", "BFS"):
+        #They stop at the first mate, so until then there is only the node count
+        lines += ["No best line", "until a mate"]
+    for i, line in enumerate(lines):
+        screen.blit(small_font.render(line, True, COLOUR_NAMES["BLACK"]), (x, y + i * 20))
+    pygame.draw.rect(screen, COLOUR_NAMES["WHITE"], (550, 540, 100, 50))
+    pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (550, 540, 100, 50), 1)
+    screen.blit(cancel_text_button, (563, 550))
 
-    if isMaximising:
-        best_score = float("-inf")
-        best_sequence = None
-        if current_player == "w":
-            player = "w"
-        else:
-            player = "b"
-        
-        possible_moves = board.generate_possible_moves(player)
-        
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        for move in possible_moves:
-            piece, square_to = move
-            board.update(piece, square_to)
-            score, sequence = minimax_with_AB(board, depth + 1, False, max_depth, player, alpha, beta, current_sequence + [move])
-            board.add_pieces(row_pieces)
-
-            if score > best_score:
-                best_score = score
-                best_sequence = sequence
-            alpha = max(alpha, best_score)
-            if beta <= alpha:  # Pruning
-                break
-        return best_score, best_sequence
-    
-    else:
-        best_score = float("inf")
-        best_sequence = None
-        if current_player == "w":
-            player = "b"
-        else:
-            player = "w"
-            
-        possible_moves = board.generate_possible_moves(player)
-        
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        for move in possible_moves:
-            piece, square_to = move
-            board.update(piece, square_to)
-            score, sequence = minimax_with_AB(board, depth + 1, True, max_depth, player, alpha, beta, current_sequence + [move])
-            board.add_pieces(row_pieces)
-            
-            if score < best_score:
-                best_score = score
-                best_sequence = sequence
-            beta = min(beta, best_score)
-            if beta <= alpha:  # Pruning
-                break
-        return best_score, best_sequence
-    
-    
-def dfs(board, depth, max_depth, player, move, sequence, moves):
-    #The DFS search algorithm that recursively calls itself until it reaches the limit
-    global move_index
-    global move_set_calculated
-    
-    move_index = max_depth
-    
-    original_position_fen = board.generate_fen()
-    row_pieces = []
-    board_line = original_position_fen.strip()
-    ranks = board_line.split("/")
-    for rank in ranks:
-        split_strings = [char for char in rank]
-        row_pieces.append(split_strings)
-        
-    if move_set_calculated == None:
-        if depth >= max_depth + max_depth - 1:
-            if check_game_over(board, player):
-                print(sequence)
-                move_set_calculated = display_moves(board, moves)
-                return move_set_calculated
-            else:
-                return None
-
-        possible_moves = board.generate_possible_moves(player)
-        
-        board_1 = chess.Board(original_position_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        for move in possible_moves:
-            piece, square_to = move
-            sequence.append(str(move))
-            if square_to in board.occupied_squares:
-                if piece.piece_type == "p" or piece.piece_type == "P":
-                    move_obj = Move(piece, square_to.x, square_to.y, piece.square.x, iscapture=True)
-                else:
-                    move_obj = Move(piece, square_to.x, square_to.y, iscapture=True)
-            else:
-                move_obj = Move(piece, square_to.x, square_to.y)
-            moves.append(move_obj)
-            
-            board.update(piece, square_to)
-            result = dfs(board, depth + 1, max_depth, "w" if player == "b" else "b", move, sequence, moves)
-
-            if result == None:
-                board.add_pieces(row_pieces)
-                sequence.pop()
-                moves.remove(move_obj)
-                
-            if depth == max_depth:
-                board.captured_pieces = []
-
-            if result is not None:
-                return result
-        return None
-    else:
-        return move_set_calculated
-    
-def bfs(board, max_depth, player):
-    global move_set_calculated
-    global move_index
-    
-    move_index = max_depth
-    moves = []
-    
-    if move_set_calculated == None:
-        # Initialize BFS with the starting player and first possible move
-        possible_moves = board.generate_possible_moves(player)
-        current_fen = board.generate_fen()
-        board_1 = chess.Board(current_fen + " " + player)
-        legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-        initial_possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-        
-        initial_row_pieces = []
-        board_line = current_fen.strip()
-        ranks = board_line.split("/")
-        for rank in ranks:
-            split_strings = [char for char in rank]
-            initial_row_pieces.append(split_strings)
-            
-        if max_depth == 1:
-            for move in initial_possible_moves:
-                piece, square_to = move
-                board.update(piece, square_to)
-                temp_player = "b" if player == "w" else "w"       
-
-                if check_game_over(board, temp_player):
-                    best_sequence = move
-                    print(best_sequence)
-                    board.add_pieces(initial_row_pieces)
-                    if square_to in board.occupied_squares:
-                        if piece.piece_type == "p" or piece.piece_type == "P":
-                            move_obj = Move(piece, square_to.x, square_to.y, piece.square.x, iscapture=True)
-                        else:
-                            move_obj = Move(piece, square_to.x, square_to.y, iscapture=True)
-                    else:
-                        move_obj = Move(piece, square_to.x, square_to.y)
-                    board.update(piece, square_to)
-                    moves.append(move_obj)
-                    move_set_calculated = display_moves(board, moves)
-                    return move_set_calculated
-                board.add_pieces(initial_row_pieces)
-            best_sequence = None
-        
-        # Initialize BFS queue with the possible moves
-        for move in initial_possible_moves:
-            piece, square_to = move
-            board.update(piece, square_to)
-            temp_player = "b" if player == "w" else "w"
-            
-            # Queue stores tuples of (board_state, move_sequence)
-            queue = deque([(board.generate_fen(), [move], 0, temp_player)])
-            visited = set()  # To avoid revisiting the same board states
-            best_sequence = None
-            
-            while queue:
-                current_fen, current_sequence, depth, current_player = queue.popleft()
-                
-                row_pieces = []
-                board_line = current_fen.strip()
-                ranks = board_line.split("/")
-                for rank in ranks:
-                    split_strings = [char for char in rank]
-                    row_pieces.append(split_strings)
-                    
-                board.add_pieces(row_pieces)
-                
-                # Check if we've reached the desired depth and if the game is over
-                if (depth >= max_depth and max_depth != 3) or (depth == 4 and max_depth == 3):
-                    if check_game_over(board, current_player):
-                        best_sequence = current_sequence
-                        print(best_sequence)
-                        board.add_pieces(initial_row_pieces)
-                        for move in best_sequence:
-                            piece, square_to = move
-                            if square_to in board.occupied_squares:
-                                if piece.piece_type == "p" or piece.piece_type == "P":
-                                    move_obj = Move(piece, square_to.x, square_to.y, piece.square.x, iscapture=True)
-                                else:
-                                    move_obj = Move(piece, square_to.x, square_to.y, iscapture=True)
-                            else:
-                                move_obj = Move(piece, square_to.x, square_to.y)
-                            board.update(piece, square_to)
-                            moves.append(move_obj)
-                        move_set_calculated = display_moves(board, moves)
-                        return move_set_calculated
-                    continue  # If max depth reached, continue to explore other branches
-
-                # If the current position is not visited, generate next moves
-                if current_fen not in visited:
-                    visited.add(current_fen)
-                    possible_moves = board.generate_possible_moves(current_player)
-                    
-                    board_1 = chess.Board(current_fen + " " + current_player)
-                    legal_moves_uci = [move.uci() for move in board_1.legal_moves]
-                    possible_moves = board.check_for_differences(legal_moves_uci, possible_moves)
-                    
-                    # Explore all the possible moves for the current player
-                    for move in possible_moves:
-                        piece, square_to = move
-                        board.update(piece, square_to)  # Apply the move
-                        next_fen = board.generate_fen()  # Get FEN after the move
-                        next_player = "w" if current_player == "b" else "b"
-                        queue.append((next_fen, current_sequence + [move], depth + 1, next_player))
-                        board.add_pieces(row_pieces)  # Undo the move by restoring FEN
-
-            # After all possible moves have been explored, restore the initial board state
-            board.add_pieces(initial_row_pieces)
-
-        return None  # No solution found
-    else:
-        return move_set_calculated
-         
 # ______________________________Algorithm clicks checker_________________________________________
 
 def check_algorithm_request(event):
     #To check the areas of left mouse clicks and trigger algorithms
     x, y = event.pos
-    if 25 < x < 135 and 610 < y < 660:
+    if 20 < x < 125 and 610 < y < 660:
         print("Minimax")
         return "Minimax"
-    if 165 < x < 325 and 610 < y < 660:
+    if 140 < x < 290 and 610 < y < 660:
         print("Minimax with Alpha Beta Pruning")
         return "Minimax with AB"
-    if 355 < x < 425 and 610 < y < 660:
+    if 305 < x < 370 and 610 < y < 660:
         print("DFS")
         return "DFS"
-    if 455 < x < 530 and 610 < y < 660:
+    if 385 < x < 450 and 610 < y < 660:
         print("BFS")
         return "BFS"
-    if 560 < x < 650 and 610 < y < 660:
+    if 465 < x < 530 and 610 < y < 660:
+        print("Proof Number Search")
+        return "PNS"
+    if 545 < x < 630 and 610 < y < 660:
         print("Reset")
         return "Reset"
+    if 550 < x < 650 and 540 < y < 590:
+        return "Cancel"  # Only shown, and only does anything, while a search is running
         
-# ______________________________FEN parser_________________________________________
-
-def parse_file(file):
-    global original_fen
-    
-    #Parses the textfile and returns the 3 lines separated and formatted
-    row_pieces = []
-    with open(file, "r") as f:
-        lines = f.readlines()
-
-    # Process the board configuration
-    board_line = lines[0].strip()
-    original_fen = board_line
-    ranks = board_line.split("/")
-
-    for rank in ranks:
-        split_strings = [char for char in rank]
-        row_pieces.append(split_strings)
-
-    # Process the player and number of moves
-    player = lines[1].strip()
-    number_of_moves = lines[2].strip()
-    
-    return row_pieces, player, number_of_moves
-
 # ______________________________Image Loader_________________________________________
 
 def load_images():
@@ -596,15 +179,15 @@ def load_images():
 # ______________________________Main Loop_________________________________________
 
 def main():
-    #Main loop
-    global move_set_calculated
+    #Main loop. The searches run in a SolveWorker thread so the window keeps drawing (and can cancel them) while they search.
     global current_player
-    global move_index
-    global duration
+    global profiling
     
     move_set = None
+    worker = None
     
     position_file = sys.argv[1]
+    init_display()
     
     parsed_file = parse_file(position_file)
     row_pieces = parsed_file[0]
@@ -613,10 +196,15 @@ def main():
     
     images = load_images()
     board = Board(8, 8, images, screen, row_pieces)
+    board.verify_moves = "--verify" in sys.argv  # Cross-check every generated move list with python-chess
+    cache_path = None if "--no-cache" in sys.argv else DEFAULT_CACHE_PATH  # Solutions are kept between runs unless --no-cache is given
+    if os.path.exists(DEFAULT_TABLES_PATH) and "--no-tables" not in sys.argv:
+        board.endgame_tables = EndgameTables(DEFAULT_TABLES_PATH)  # Built with build_tables.py
     algorithm = None
     
     board.draw_board()
     board.add_pieces(row_pieces)
+    board.update_sprites()
     board.draw_pieces()
             
     running = True
@@ -625,48 +213,50 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+                if worker is not None:
+                    worker.cancel()
+                    worker.join()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_i:
                     board.display_indexes = not board.display_indexes 
+                elif event.key == pygame.K_f:
+                    board.forcing_only = not board.forcing_only  # Only checking moves for the side solving the puzzle
+                    print("Forcing moves only: " + ("on" if board.forcing_only else "off"))
+                elif event.key == pygame.K_p:
+                    profiling = not profiling
+                    print("Profiling: " + ("on" if profiling else "off"))
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:
                     algorithm = check_algorithm_request(event)
         screen.fill(COLOUR_NAMES["LIGHT_GREY"])
         
-        if algorithm == "Minimax":
-            start_time = time.time()
-            move_set = get_best_move(board, number_of_moves, current_player)
-            end_time = time.time()
-            if not duration:
-                duration_time = round(end_time - start_time, 4)
-                duration = True
-        
-        if algorithm == "BFS":
-            start_time = time.time()
-            move_set = bfs(board, number_of_moves, current_player)
-            end_time = time.time()
-            if not duration:
-                duration_time = round(end_time - start_time, 4)
-                duration = True
-            
-        if algorithm == "DFS":
-            move = None
-            sequence = []
-            moves = []
-            start_time = time.time()
-            move_set = dfs(board, 0, number_of_moves, current_player, move, sequence, moves)
-            end_time = time.time()
-            if not duration:
-                duration_time = round(end_time - start_time, 4)
-                duration = True
-            
-        if algorithm == "Minimax with AB":
-            start_time = time.time()
-            move_set = get_best_move_with_AB(board, number_of_moves, current_player)
-            end_time = time.time()
-            if not duration:
-                duration_time = round(end_time - start_time, 4)
-                duration = True
+        if algorithm in ("Minimax", "Minimax with AB", "DFS", "BFS", "PNS") and worker is None and move_set is None:
+            worker = SolveWorker(board, algorithm, number_of_moves, current_player, position_file if profiling else None, cache_path)
+            worker.start()
+
+        if algorithm == "Cancel" and worker is not None:
+            print("Cancelling " + worker.algorithm)
+            worker.cancel()
+
+        if worker is not None and worker.done.is_set():
+            if worker.error is not None:
+                print("Search failed: " + str(worker.error))
+            elif worker.cancelled:
+                print("Search cancelled")
+            elif worker.sequence is None:
+                print("No solution found")
+                move_set = []
+            else:
+                print([board.move_uci(move) for move in worker.sequence])
+                if worker.board.cached is not None:
+                    print(f"From the solution cache, first solved in {worker.board.cached[0]} nodes and {round(worker.board.cached[1], 4)}s")
+                board.stats = worker.board.stats
+                duration_time = round(worker.duration, 4)
+                move_set = display_moves(board, board.play_moves(worker.sequence))
+            worker = None
+
+        if worker is not None:
+            display_progress(worker)
             
         if move_set:
             y_offset = 100  # Initial Y position for moves
@@ -698,35 +288,42 @@ def main():
             # Display the time below all moves
             screen.blit(font.render("Time: ", True, COLOUR_NAMES["BLACK"]), (x_number_offset, y_offset + len(move_pairs) * y_step + 20))
             screen.blit(font.render(str(duration_time), True, COLOUR_NAMES["BLACK"]), (620, y_offset + len(move_pairs) * y_step + 20))
+            display_stats(board.stats, x_number_offset, y_offset + len(move_pairs) * y_step + 55)
 
 
         if algorithm == "Reset":
+            if worker is not None:
+                worker.cancel()
+                worker.join()
+                worker = None
             board.draw_board()
             board.add_pieces(row_pieces)
+            board.update_sprites()
             board.draw_pieces()
-            move_set_calculated = None
             move_set = None
-            board.captured_pieces = []
-            duration = False
             
-        pygame.draw.rect(screen, COLOUR_NAMES["WHITE"], (25, 610, 110, 50))
-        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (25, 610, 110, 50), 1)
-        screen.blit(minimax_text_button, (40, 620))
-        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (165, 610, 160, 50))
-        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (165, 610, 160, 50), 1)
-        screen.blit(minimax_with_AB_text_button, (180, 620))
-        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (355, 610, 70, 50))
-        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (355, 610, 70, 50), 1)
-        screen.blit(DFS_text_button, (370, 620))
-        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (455, 610, 75, 50))
-        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (455, 610, 75, 50), 1)
-        screen.blit(BFS_text_button, (470, 620))
-        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (560, 610, 90, 50))
-        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (560, 610, 90, 50), 1)
-        screen.blit(reset_text_button, (575, 620))
+        algorithm = None  # Each click is handled once
+
+        pygame.draw.rect(screen, COLOUR_NAMES["WHITE"], (20, 610, 105, 50))
+        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (20, 610, 105, 50), 1)
+        screen.blit(minimax_text_button, (33, 620))
+        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (140, 610, 150, 50))
+        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (140, 610, 150, 50), 1)
+        screen.blit(minimax_with_AB_text_button, (152, 620))
+        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (305, 610, 65, 50))
+        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (305, 610, 65, 50), 1)
+        screen.blit(DFS_text_button, (318, 620))
+        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (385, 610, 65, 50))
+        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (385, 610, 65, 50), 1)
+        screen.blit(BFS_text_button, (398, 620))
+        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (465, 610, 65, 50))
+        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (465, 610, 65, 50), 1)
+        screen.blit(PNS_text_button, (477, 620))
+        pygame.draw.rect(screen,COLOUR_NAMES["WHITE"], (545, 610, 85, 50))
+        pygame.draw.rect(screen, COLOUR_NAMES["BLACK"], (545, 610, 85, 50), 1)
+        screen.blit(reset_text_button, (558, 620))
         board.draw_board()
-        for piece in board.pieces:
-            piece.draw(screen)
+        board.draw_pieces()
         if board.display_indexes:
             board.draw_indexes()
         pygame.display.flip()
@@ -0,0 +1,171 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from solver.bitboard import Position, COLOUR_INDEX, move_uci
+try:
+    import chess  # Optional, only needed for --compare
+except ImportError:
+    chess = None
+
+#Well known perft positions (name, fen, depth). The node counts are checked against python-chess in --compare mode.
+SUITE = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 3),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 2),
+    ("en passant pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 3),
+    ("castling", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 2),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", 2),
+]
+POSITION_FILE_DEPTH = 3
+
+
+def load_position(fen):
+    #Returns the Position and the colour to move for a FEN string (the side defaults to white)
+    position = Position()
+    position.load_fen(fen)
+    fields = fen.split()
+    player = fields[1] if len(fields) > 1 else "w"
+    return position, COLOUR_INDEX[player]
+
+
+def position_file_fen(path):
+    #Turns a position file (board line, side to move, number of moves) into a FEN string
+    with open(path, "r") as f:
+        lines = f.readlines()
+    return lines[0].strip() + " " + lines[1].strip()
+
+
+def count_nodes(position, colour, depth):
+    if depth == 0:
+        return 1
+    moves = position.legal_moves(colour)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo_record = position.make_move(move)
+        nodes += count_nodes(position, 1 - colour, depth - 1)
+        position.unmake_move(undo_record)
+    return nodes
+
+
+def perft(fen, depth, divide=False):
+    """Counts the leaf nodes of the legal move tree of a position to the given depth.
+    Returns (nodes, divide) where divide maps each root move (uci) to its node count.
+    The divide counts are printed when divide is True.
+    """
+    if depth == 0:
+        return 1, {}
+    position, colour = load_position(fen)
+    results = {}
+    for move in position.legal_moves(colour):
+        undo_record = position.make_move(move)
+        results[move_uci(move)] = count_nodes(position, 1 - colour, depth - 1)
+        position.unmake_move(undo_record)
+    if divide:
+        for uci in sorted(results):
+            print(f"{uci}: {results[uci]}")
+    return sum(results.values()), results
+
+
+def python_chess_perft(fen, depth):
+    #The same divide counts from python-chess, used as the reference
+    board = chess.Board(fen)
+
+    def count(depth):
+        if depth == 0:
+            return 1
+        nodes = 0
+        for move in board.legal_moves:
+            board.push(move)
+            nodes += count(depth - 1)
+            board.pop()
+        return nodes
+
+    results = {}
+    for move in board.legal_moves:
+        board.push(move)
+        results[move.uci()] = count(depth - 1)
+        board.pop()
+    return sum(results.values()), results
+
+
+def timed_perft(fen, depth, divide=False):
+    #Runs perft and prints the node count with the nodes per second
+    start_time = time.time()
+    nodes, results = perft(fen, depth, divide)
+    duration = time.time() - start_time
+    nps = nodes / duration if duration > 0 else float("inf")
+    print(f"depth {depth}: {nodes} nodes in {round(duration, 4)}s ({round(nps)} nodes/sec)")
+    return nodes, results
+
+
+def compare(fen, depth):
+    #Compares our divide counts against python-chess and prints the root moves that differ. Returns True if they match.
+    position, colour = load_position(fen)
+    full_fen = position.full_fen("w" if colour == 0 else "b")
+    nodes, results = perft(full_fen, depth)
+    expected_nodes, expected = python_chess_perft(full_fen, depth)
+    if nodes == expected_nodes and results == expected:
+        return True
+    print(f"MISMATCH at {full_fen}: {nodes} nodes, python-chess has {expected_nodes}")
+    for uci in sorted(set(results) | set(expected)):
+        if results.get(uci) != expected.get(uci):
+            print(f"  {uci}: ours {results.get(uci)}, python-chess {expected.get(uci)}")
+    return False
+
+
+def suite_positions(directory):
+    #The built in perft suite plus every bundled position*.txt puzzle
+    positions = list(SUITE)
+    for path in sorted(glob.glob(os.path.join(directory, "position*.txt"))):
+        positions.append((os.path.basename(path), position_file_fen(path), POSITION_FILE_DEPTH))
+    return positions
+
+
+def run_suite(depth=None, check=False, directory="."):
+    #Runs perft over the suite, optionally checking every position against python-chess. Returns True if nothing differed.
+    all_match = True
+    total_nodes = 0
+    start_time = time.time()
+    for name, fen, suite_depth in suite_positions(directory):
+        depth_used = depth or suite_depth
+        print(f"{name} ({fen})")
+        nodes, _ = timed_perft(fen, depth_used)
+        total_nodes += nodes
+        if check:
+            matched = compare(fen, depth_used)
+            all_match = all_match and matched
+            print("  python-chess: " + ("OK" if matched else "MISMATCH"))
+    duration = time.time() - start_time
+    print(f"total: {total_nodes} nodes in {round(duration, 4)}s")
+    return all_match
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft benchmark and python-chess differential check for the move generator.")
+    parser.add_argument("position", nargs="?", help="FEN string or position file. Runs the whole suite when left out.")
+    parser.add_argument("depth", nargs="?", type=int, help="Search depth in plies")
+    parser.add_argument("--divide", action="store_true", help="Print the node count of every root move")
+    parser.add_argument("--compare", action="store_true", help="Compare the node counts with python-chess")
+    args = parser.parse_args()
+
+    if args.compare and chess is None:
+        parser.error("--compare needs the python-chess library")
+
+    if args.position is None:
+        return 0 if run_suite(args.depth, args.compare) else 1
+
+    fen = position_file_fen(args.position) if os.path.isfile(args.position) else args.position
+    timed_perft(fen, args.depth or POSITION_FILE_DEPTH, args.divide)
+    if args.compare:
+        matched = compare(fen, args.depth or POSITION_FILE_DEPTH)
+        print("python-chess: " + ("OK" if matched else "MISMATCH"))
+        return 0 if matched else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import sys
+from solver.cli import main
+
+#Batch command line solver. Eg: python solve.py --algorithm dfs position1.txt position2.txt
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+#Headless chess puzzle solver: board model, move generation and the search algorithms. Nothing here imports pygame.
+from .bitboard import Position, encode_move, move_uci
+from .board import Board, SearchCancelled
+from .cache import SolutionCache
+from .endgame import EndgameTables, build_tables
+from .limits import SearchLimitReached, SearchLimits
+from .move import Move
+from .piece import Piece
+from .puzzles import Puzzle, PuzzleIndex, build_index, iter_puzzles, open_index, parse_file
+from .search import ALGORITHMS, bfs, check_game_over, dfs, get_best_move, get_best_move_with_AB, iterative_deepening, proof_number_search, solve
+from .square import Square
+from .stats import SearchStats
+from .transposition import TranspositionTable
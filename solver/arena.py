@@ -0,0 +1,74 @@
+from array import array
+
+#Default memory budget of a node arena in megabytes
+DEFAULT_ARENA_MB = 256
+#Bytes used by one node: the twelve bitboards, the castling rights and en passant square, the Zobrist key,
+#the parent index and the move from the parent
+NODE_BYTES = 12 * 8 + 2 + 8 + 4 + 4
+#Stored in place of the en passant square when there is none
+NO_EN_PASSANT = 64
+
+
+class ArenaFull(Exception):
+    """Raised when a NodeArena has used up its memory budget."""
+
+
+class NodeArena:
+    """Search node store class containing packed positions in flat arrays: the twelve bitboards, the castling rights and
+    en passant square, the Zobrist key, the index of the parent node and the encoded move from the parent.
+    Nodes are numbered in the order they are added, so a breadth first search can keep each depth's frontier as a range
+    of indices, and a line is rebuilt by walking the parents up to the root (the node with parent -1).
+    Adding more nodes than fit in memory_mb raises ArenaFull.
+    Returns the number of nodes and the memory they use.
+    Eg: <NodeArena 1520 nodes, 0.17 MB>
+    """
+    def __init__(self, memory_mb=DEFAULT_ARENA_MB):
+        self.memory_mb = memory_mb
+        self.max_nodes = int(memory_mb * 1024 * 1024) // NODE_BYTES
+        self.clear()
+
+    def __repr__(self):
+        return f"<NodeArena {len(self)} nodes, {round(self.memory_bytes / (1024 * 1024), 2)} MB>"
+
+    def __len__(self):
+        return len(self.parents)
+
+    @property
+    def memory_bytes(self):
+        return len(self) * NODE_BYTES
+
+    def clear(self):
+        self.bitboards = array("Q")
+        self.states = array("H")
+        self.keys = array("Q")
+        self.parents = array("i")
+        self.moves = array("I")
+
+    def add(self, snapshot, parent, move):
+        #Packs a position snapshot (see Position.snapshot) reached by playing move from the parent node and returns the index of the new node.
+        #The root has parent -1 and move 0.
+        if len(self.parents) >= self.max_nodes:
+            raise ArenaFull(f"node arena is full ({self.max_nodes} nodes, {self.memory_mb} MB)")
+        bitboards, castling, en_passant, key = snapshot
+        self.bitboards.extend(bitboards)
+        self.states.append(castling | ((NO_EN_PASSANT if en_passant is None else en_passant) << 4))
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.moves.append(move)
+        return len(self.parents) - 1
+
+    def snapshot(self, index):
+        #The position stored in a node, as a snapshot for Position.load_snapshot
+        state = self.states[index]
+        en_passant = state >> 4
+        return (tuple(self.bitboards[index * 12:index * 12 + 12]), state & 15,
+                None if en_passant == NO_EN_PASSANT else en_passant, self.keys[index])
+
+    def line(self, index):
+        #The moves from the root to the node
+        moves = []
+        while self.parents[index] >= 0:
+            moves.append(self.moves[index])
+            index = self.parents[index]
+        moves.reverse()
+        return moves
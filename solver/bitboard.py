@@ -0,0 +1,806 @@
+import random
+
+#Bitboard constants. Square 0 is a1, square 7 is h1 and square 63 is h8 (index = y * 8 + x).
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+NOT_A = FULL ^ FILE_A
+NOT_H = FULL ^ FILE_H
+NOT_AB = FULL ^ (FILE_A | FILE_B)
+NOT_GH = FULL ^ (FILE_G | FILE_H)
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_4 = RANK_1 << 24
+RANK_5 = RANK_1 << 32
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+WHITE = 0
+BLACK = 1
+COLOUR_INDEX = {"w": WHITE, "b": BLACK}
+
+#The twelve bitboards are stored in this order: white pieces then black pieces
+PIECE_CHARS = "PNBRQKpnbrqk"
+PIECE_INDEX = {char: index for index, char in enumerate(PIECE_CHARS)}
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+#Moves are stored as ints: the from square in bits 0-5, the to square in bits 6-11,
+#the promotion piece kind (KNIGHT to QUEEN, 0 for none) in bits 12-14 and the special move flags above that
+SQUARE_NAMES = [file + rank for rank in "12345678" for file in "abcdefgh"]
+SQUARE_INDEX = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+PROMOTION_SHIFT = 12
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+EN_PASSANT = 1 << 15
+CASTLE = 1 << 16
+
+#Castling rights bits, in FEN order, and the rights lost when a piece moves from or to each square
+CASTLE_WHITE_KING = 1
+CASTLE_WHITE_QUEEN = 2
+CASTLE_BLACK_KING = 4
+CASTLE_BLACK_QUEEN = 8
+CASTLING_CHARS = "KQkq"
+CASTLING_KEPT = [15] * 64
+CASTLING_KEPT[SQUARE_INDEX["e1"]] = 15 ^ (CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN)
+CASTLING_KEPT[SQUARE_INDEX["h1"]] = 15 ^ CASTLE_WHITE_KING
+CASTLING_KEPT[SQUARE_INDEX["a1"]] = 15 ^ CASTLE_WHITE_QUEEN
+CASTLING_KEPT[SQUARE_INDEX["e8"]] = 15 ^ (CASTLE_BLACK_KING | CASTLE_BLACK_QUEEN)
+CASTLING_KEPT[SQUARE_INDEX["h8"]] = 15 ^ CASTLE_BLACK_KING
+CASTLING_KEPT[SQUARE_INDEX["a8"]] = 15 ^ CASTLE_BLACK_QUEEN
+#King destination square: (rook from, rook to)
+CASTLING_ROOK_MOVES = {
+    SQUARE_INDEX["g1"]: (SQUARE_INDEX["h1"], SQUARE_INDEX["f1"]),
+    SQUARE_INDEX["c1"]: (SQUARE_INDEX["a1"], SQUARE_INDEX["d1"]),
+    SQUARE_INDEX["g8"]: (SQUARE_INDEX["h8"], SQUARE_INDEX["f8"]),
+    SQUARE_INDEX["c8"]: (SQUARE_INDEX["a8"], SQUARE_INDEX["d8"]),
+}
+
+#(shift, mask) pairs used to slide a bitboard one step in a direction without wrapping around the board
+NORTH = (8, FULL)
+SOUTH = (-8, FULL)
+EAST = (1, NOT_A)
+WEST = (-1, NOT_H)
+NORTH_EAST = (9, NOT_A)
+NORTH_WEST = (7, NOT_H)
+SOUTH_EAST = (-7, NOT_A)
+SOUTH_WEST = (-9, NOT_H)
+ORTHOGONAL = (NORTH, SOUTH, EAST, WEST)
+DIAGONAL = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+
+
+#Zobrist keys: one random 64 bit number per (piece, square), per castling rights value and per en passant square,
+#plus one for black to move. The seed is fixed so every process (see parallel.py) hashes positions the same way.
+def _zobrist_numbers(count, generator):
+    return [generator.getrandbits(64) for _ in range(count)]
+
+
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [_zobrist_numbers(64, _zobrist_random) for _ in range(12)]
+ZOBRIST_CASTLING = _zobrist_numbers(16, _zobrist_random)
+ZOBRIST_EN_PASSANT = _zobrist_numbers(64, _zobrist_random)
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_SIDE = (0, ZOBRIST_BLACK_TO_MOVE)
+
+
+def shift(bb, direction):
+    #Moves every bit of the bitboard one step in the given direction
+    amount, mask = direction
+    if amount > 0:
+        return (bb << amount) & mask & FULL
+    return (bb >> -amount) & mask
+
+
+def encode_move(from_sq, to_sq, promotion=0, flags=0):
+    return from_sq | (to_sq << 6) | (promotion << PROMOTION_SHIFT) | flags
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_promotion(move):
+    #The piece kind a pawn promotes to, or 0
+    return (move >> PROMOTION_SHIFT) & 7
+
+
+def move_uci(move):
+    uci = SQUARE_NAMES[move_from(move)] + SQUARE_NAMES[move_to(move)]
+    promotion = move_promotion(move)
+    if promotion:
+        uci += PIECE_CHARS[6 + promotion]
+    return uci
+
+
+def squares_of(bb):
+    #Yields the index of every set bit, lowest square first
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def knight_attacks(bb):
+    l1 = (bb >> 1) & NOT_H
+    l2 = (bb >> 2) & NOT_GH
+    r1 = (bb << 1) & NOT_A
+    r2 = (bb << 2) & NOT_AB
+    h1 = l1 | r1
+    h2 = l2 | r2
+    return ((h1 << 16) | (h1 >> 16) | (h2 << 8) | (h2 >> 8)) & FULL
+
+
+def king_attacks(bb):
+    attacks = ((bb << 1) & NOT_A) | ((bb >> 1) & NOT_H)
+    row = bb | attacks
+    return (attacks | (row << 8) | (row >> 8)) & FULL
+
+
+def pawn_attacks(bb, colour):
+    if colour == WHITE:
+        return (((bb << 7) & NOT_H) | ((bb << 9) & NOT_A)) & FULL
+    return ((bb >> 9) & NOT_H) | ((bb >> 7) & NOT_A)
+
+
+def slide(bb, occupied, directions):
+    #Squares reached by sliding from every bit in bb, stopping on (and including) the first occupied square
+    attacks = 0
+    for direction in directions:
+        ray = bb
+        while ray:
+            ray = shift(ray, direction)
+            attacks |= ray
+            ray &= ~occupied
+    return attacks
+
+
+#Attack tables by square: knight, king and pawn attacks (by colour), the squares on the diagonals and on the rank and file
+#of a square, and BETWEEN[a * 64 + b], the squares strictly between two squares on the same line (0 if they are not)
+KNIGHT_TABLE = [knight_attacks(1 << sq) for sq in range(64)]
+KING_TABLE = [king_attacks(1 << sq) for sq in range(64)]
+PAWN_TABLE = [[pawn_attacks(1 << sq, colour) for sq in range(64)] for colour in (WHITE, BLACK)]
+DIAGONAL_RAYS = [slide(1 << sq, 0, DIAGONAL) for sq in range(64)]
+ORTHOGONAL_RAYS = [slide(1 << sq, 0, ORTHOGONAL) for sq in range(64)]
+
+
+def between_table():
+    table = [0] * 4096
+    for sq in range(64):
+        for direction in ORTHOGONAL + DIAGONAL:
+            between = 0
+            ray = shift(1 << sq, direction)
+            while ray:
+                table[sq * 64 + ray.bit_length() - 1] = between
+                between |= ray
+                ray = shift(ray, direction)
+    return table
+
+
+BETWEEN = between_table()
+
+#Ray tables by direction and square: every square in the direction up to the edge of the board. A slider's attacks in a
+#direction are the ray minus the ray of the first blocker. Increasing directions meet their first blocker at the lowest bit.
+NORTH_RAYS, EAST_RAYS, NORTH_EAST_RAYS, NORTH_WEST_RAYS, SOUTH_RAYS, WEST_RAYS, SOUTH_EAST_RAYS, SOUTH_WEST_RAYS = (
+    [slide(1 << sq, 0, (direction,)) for sq in range(64)]
+    for direction in (NORTH, EAST, NORTH_EAST, NORTH_WEST, SOUTH, WEST, SOUTH_EAST, SOUTH_WEST))
+
+
+def diagonal_attacks(sq, occupied):
+    #Bishop attacks from the square, stopping on (and including) the first occupied square in each direction
+    attacks = 0
+    for rays in (NORTH_EAST_RAYS, NORTH_WEST_RAYS):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (SOUTH_EAST_RAYS, SOUTH_WEST_RAYS):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def orthogonal_attacks(sq, occupied):
+    #Rook attacks from the square, stopping on (and including) the first occupied square in each direction
+    attacks = 0
+    for rays in (NORTH_RAYS, EAST_RAYS):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (SOUTH_RAYS, WEST_RAYS):
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+class Position:
+    """Bitboard position containing the twelve piece bitboards (PNBRQK for white then pnbrqk for black), the occupancy masks,
+    a mailbox with the bitboard index of the piece on every square, the castling rights, the en passant square and the Zobrist key of all of those, kept up to date by every change.
+    The squares attacked by each side (see attack_map) are worked out when first needed and kept until the pieces move,
+    and unmake_move puts back the maps of the position it returns to.
+    The side to move is passed to the functions that need it (see hash_key).
+    Returns the board part of the FEN string.
+    Eg: <Position 4k3/1Q6/5K2/7q/8/8/8/8>
+    """
+    def __init__(self):
+        self.clear()
+
+    def __repr__(self):
+        return f"<Position {self.fen()}>"
+
+    def clear(self):
+        self.bitboards = [0] * 12
+        self.colour_occupancy = [0, 0]
+        self.occupied = 0
+        self.mailbox = [None] * 64
+        self.castling = 0
+        self.en_passant = None
+        self.key = ZOBRIST_CASTLING[0]
+        self.attack_maps = [None, None]
+
+    def compute_key(self):
+        #Zobrist key of the position worked out from scratch. make_move and unmake_move update self.key incrementally instead.
+        key = ZOBRIST_CASTLING[self.castling]
+        for index, bb in enumerate(self.bitboards):
+            for sq in squares_of(bb):
+                key ^= ZOBRIST_PIECES[index][sq]
+        if self.en_passant is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant]
+        return key
+
+    def hash_key(self, colour):
+        #Zobrist key of the position with the given colour (WHITE or BLACK) to move
+        return self.key ^ ZOBRIST_SIDE[colour]
+
+    def load_rows(self, row_pieces):
+        #Loads the split ranks of a FEN string, rank 8 first (the format returned by parse_file)
+        self.clear()
+        for y, rank in enumerate(row_pieces):
+            x = 0
+            for char in rank:
+                if char.isdigit():
+                    x += int(char)
+                elif char in PIECE_INDEX:
+                    self.put(char, (7 - y) * 8 + x)
+                    x += 1
+        self.castling = self.infer_castling()
+        self.key = self.compute_key()
+
+    def infer_castling(self):
+        #Puzzle files only hold the board, so castling is allowed wherever the king and rook are still on their starting squares
+        castling = 0
+        for right, king, rook in ((CASTLE_WHITE_KING, "K", "h1"), (CASTLE_WHITE_QUEEN, "K", "a1"),
+                                  (CASTLE_BLACK_KING, "k", "h8"), (CASTLE_BLACK_QUEEN, "k", "a8")):
+            king_start = "e1" if king == "K" else "e8"
+            rook_char = "R" if king == "K" else "r"
+            if self.piece_at(SQUARE_INDEX[king_start]) == king and self.piece_at(SQUARE_INDEX[rook]) == rook_char:
+                castling |= right
+        return castling
+
+    def load_fen(self, fen):
+        #Loads a FEN string. The castling and en passant fields are used when present.
+        fields = fen.strip().split()
+        self.load_rows([list(rank) for rank in fields[0].split("/")])
+        if len(fields) > 2:
+            self.castling = 0
+            for index, char in enumerate(CASTLING_CHARS):
+                if char in fields[2]:
+                    self.castling |= 1 << index
+        if len(fields) > 3 and fields[3] != "-":
+            self.en_passant = SQUARE_INDEX[fields[3]]
+        self.key = self.compute_key()
+
+    def snapshot(self):
+        #Compact copy of the position (plain ints in tuples), cheap to pickle and send to worker processes
+        return (tuple(self.bitboards), self.castling, self.en_passant, self.key)
+
+    def load_snapshot(self, snapshot):
+        bitboards, self.castling, self.en_passant, self.key = snapshot
+        self.bitboards = list(bitboards)
+        self.colour_occupancy = [0, 0]
+        self.mailbox = mailbox = [None] * 64
+        for index, bb in enumerate(self.bitboards):
+            self.colour_occupancy[index // 6] |= bb
+            for sq in squares_of(bb):
+                mailbox[sq] = index
+        self.occupied = self.colour_occupancy[WHITE] | self.colour_occupancy[BLACK]
+        self.attack_maps = [None, None]
+
+    def full_fen(self, player):
+        #Full FEN string with the side to move, castling rights and en passant square
+        castling = "".join(char for index, char in enumerate(CASTLING_CHARS) if self.castling & (1 << index)) or "-"
+        en_passant = SQUARE_NAMES[self.en_passant] if self.en_passant is not None else "-"
+        return f"{self.fen()} {player} {castling} {en_passant} 0 1"
+
+    def fen(self):
+        #Generates the board part of the FEN string of the position
+        ranks = []
+        for y in range(7, -1, -1):
+            rank = ''
+            empty_count = 0
+            for x in range(8):
+                char = self.piece_at(y * 8 + x)
+                if char is None:
+                    empty_count += 1
+                    continue
+                if empty_count > 0:
+                    rank += str(empty_count)
+                    empty_count = 0
+                rank += char
+            if empty_count > 0:
+                rank += str(empty_count)
+            ranks.append(rank)
+        return "/".join(ranks)
+
+    def index_at(self, sq):
+        #Returns the bitboard index of the piece on the square or None if it is empty
+        return self.mailbox[sq]
+
+    def piece_at(self, sq):
+        #Returns the piece character on the square or None if it is empty
+        index = self.index_at(sq)
+        if index is None:
+            return None
+        return PIECE_CHARS[index]
+
+    def put(self, char, sq):
+        index = PIECE_INDEX[char]
+        bit = 1 << sq
+        self.bitboards[index] |= bit
+        self.colour_occupancy[index // 6] |= bit
+        self.occupied |= bit
+        self.mailbox[sq] = index
+        self.key ^= ZOBRIST_PIECES[index][sq]
+        self.attack_maps = [None, None]
+
+    def remove(self, sq):
+        #Removes and returns whatever piece is on the square
+        char = self.piece_at(sq)
+        if char is not None:
+            index = PIECE_INDEX[char]
+            bit = 1 << sq
+            self.bitboards[index] ^= bit
+            self.colour_occupancy[index // 6] ^= bit
+            self.occupied ^= bit
+            self.mailbox[sq] = None
+            self.key ^= ZOBRIST_PIECES[index][sq]
+            self.attack_maps = [None, None]
+        return char
+
+    def make_move(self, move):
+        """Plays an encoded move on the bitboards, including castling, en passant and promotion, and updates the Zobrist key.
+        Returns the undo record (move, moved piece index, captured piece index or None, castling rights, en passant square, key,
+        attack maps) needed by unmake_move.
+        """
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        to_bit = 1 << to_sq
+        bitboards = self.bitboards
+        colour_occupancy = self.colour_occupancy
+        mailbox = self.mailbox
+        moved = mailbox[from_sq]
+        old_castling = self.castling
+        old_en_passant = self.en_passant
+        old_key = key = self.key
+        if move & EN_PASSANT:
+            #The captured pawn is behind the destination square
+            captured = 6 + PAWN if moved < 6 else PAWN
+            captured_sq = to_sq - 8 if moved < 6 else to_sq + 8
+            captured_bit = 1 << captured_sq
+            bitboards[captured] ^= captured_bit
+            colour_occupancy[captured // 6] ^= captured_bit
+            mailbox[captured_sq] = None
+            key ^= ZOBRIST_PIECES[captured][captured_sq]
+        else:
+            captured = mailbox[to_sq]
+            if captured is not None:
+                bitboards[captured] ^= to_bit
+                colour_occupancy[captured // 6] ^= to_bit
+                key ^= ZOBRIST_PIECES[captured][to_sq]
+        move_mask = (1 << from_sq) | to_bit
+        bitboards[moved] ^= move_mask
+        colour_occupancy[moved // 6] ^= move_mask
+        mailbox[from_sq] = None
+        promotion = (move >> PROMOTION_SHIFT) & 7
+        if promotion:
+            bitboards[moved] ^= to_bit
+            bitboards[moved - PAWN + promotion] ^= to_bit
+            mailbox[to_sq] = moved - PAWN + promotion
+            key ^= ZOBRIST_PIECES[moved][from_sq] ^ ZOBRIST_PIECES[moved - PAWN + promotion][to_sq]
+        else:
+            mailbox[to_sq] = moved
+            key ^= ZOBRIST_PIECES[moved][from_sq] ^ ZOBRIST_PIECES[moved][to_sq]
+            if move & CASTLE:
+                rook_from, rook_to = CASTLING_ROOK_MOVES[to_sq]
+                rook_mask = (1 << rook_from) | (1 << rook_to)
+                rook = moved - KING + ROOK
+                bitboards[rook] ^= rook_mask
+                colour_occupancy[moved // 6] ^= rook_mask
+                mailbox[rook_from] = None
+                mailbox[rook_to] = rook
+                key ^= ZOBRIST_PIECES[rook][rook_from] ^ ZOBRIST_PIECES[rook][rook_to]
+        self.occupied = colour_occupancy[WHITE] | colour_occupancy[BLACK]
+        self.castling = old_castling & CASTLING_KEPT[from_sq] & CASTLING_KEPT[to_sq]
+        key ^= ZOBRIST_CASTLING[old_castling] ^ ZOBRIST_CASTLING[self.castling]
+        if old_en_passant is not None:
+            key ^= ZOBRIST_EN_PASSANT[old_en_passant]
+        if moved % 6 == PAWN and (to_sq - from_sq == 16 or from_sq - to_sq == 16):
+            self.en_passant = (from_sq + to_sq) // 2
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant]
+        else:
+            self.en_passant = None
+        self.key = key
+        old_attack_maps = self.attack_maps
+        self.attack_maps = [None, None]
+        return (move, moved, captured, old_castling, old_en_passant, old_key, old_attack_maps)
+
+    def unmake_move(self, undo_record):
+        #Takes back the move described by an undo record from make_move
+        move, moved, captured, self.castling, self.en_passant, self.key, self.attack_maps = undo_record
+        to_sq = (move >> 6) & 63
+        to_bit = 1 << to_sq
+        bitboards = self.bitboards
+        colour_occupancy = self.colour_occupancy
+        mailbox = self.mailbox
+        promotion = (move >> PROMOTION_SHIFT) & 7
+        if promotion:
+            bitboards[moved - PAWN + promotion] ^= to_bit
+            bitboards[moved] ^= to_bit
+        elif move & CASTLE:
+            rook_from, rook_to = CASTLING_ROOK_MOVES[to_sq]
+            rook_mask = (1 << rook_from) | (1 << rook_to)
+            bitboards[moved - KING + ROOK] ^= rook_mask
+            colour_occupancy[moved // 6] ^= rook_mask
+            mailbox[rook_to] = None
+            mailbox[rook_from] = moved - KING + ROOK
+        move_mask = (1 << (move & 63)) | to_bit
+        bitboards[moved] ^= move_mask
+        colour_occupancy[moved // 6] ^= move_mask
+        mailbox[move & 63] = moved
+        mailbox[to_sq] = None
+        if captured is not None:
+            if move & EN_PASSANT:
+                to_sq = to_sq - 8 if moved < 6 else to_sq + 8
+                to_bit = 1 << to_sq
+            bitboards[captured] ^= to_bit
+            colour_occupancy[captured // 6] ^= to_bit
+            mailbox[to_sq] = captured
+        self.occupied = colour_occupancy[WHITE] | colour_occupancy[BLACK]
+
+    def pieces_of(self, colour, kind):
+        return self.bitboards[colour * 6 + kind]
+
+    def king_square(self, colour):
+        king = self.bitboards[colour * 6 + KING]
+        if not king:
+            return None
+        return king.bit_length() - 1
+
+    def is_attacked(self, sq, by_colour):
+        #Checks whether any piece of by_colour attacks the square
+        offset = by_colour * 6
+        bitboards = self.bitboards
+        if PAWN_TABLE[1 - by_colour][sq] & bitboards[offset + PAWN]:
+            return True
+        if KNIGHT_TABLE[sq] & bitboards[offset + KNIGHT]:
+            return True
+        if KING_TABLE[sq] & bitboards[offset + KING]:
+            return True
+        queens = bitboards[offset + QUEEN]
+        diagonal_sliders = (bitboards[offset + BISHOP] | queens) & DIAGONAL_RAYS[sq]
+        if diagonal_sliders and diagonal_attacks(sq, self.occupied) & diagonal_sliders:
+            return True
+        orthogonal_sliders = (bitboards[offset + ROOK] | queens) & ORTHOGONAL_RAYS[sq]
+        if orthogonal_sliders and orthogonal_attacks(sq, self.occupied) & orthogonal_sliders:
+            return True
+        return False
+
+    def attacks_of(self, colour, occupied):
+        #Every square attacked by the pieces of colour, with sliders blocked by the given occupancy
+        offset = colour * 6
+        bitboards = self.bitboards
+        attacks = pawn_attacks(bitboards[offset + PAWN], colour) | knight_attacks(bitboards[offset + KNIGHT])
+        for sq in squares_of(bitboards[offset + KING]):
+            attacks |= KING_TABLE[sq]
+        queens = bitboards[offset + QUEEN]
+        for sq in squares_of(bitboards[offset + BISHOP] | queens):
+            attacks |= diagonal_attacks(sq, occupied)
+        for sq in squares_of(bitboards[offset + ROOK] | queens):
+            attacks |= orthogonal_attacks(sq, occupied)
+        return attacks
+
+    def attack_map(self, colour):
+        #Every square attacked by colour in the current position, kept until the pieces change
+        attack_map = self.attack_maps[colour]
+        if attack_map is None:
+            attack_map = self.attack_maps[colour] = self.attacks_of(colour, self.occupied)
+        return attack_map
+
+    def in_check(self, colour):
+        king = self.king_square(colour)
+        return king is not None and self.is_attacked(king, 1 - colour)
+
+    def attackers(self, sq, by_colour, occupied):
+        #Bitboard of the pieces of by_colour that attack the square, with sliders blocked by the given occupancy
+        offset = by_colour * 6
+        bitboards = self.bitboards
+        queens = bitboards[offset + QUEEN]
+        attackers = ((PAWN_TABLE[1 - by_colour][sq] & bitboards[offset + PAWN])
+                     | (KNIGHT_TABLE[sq] & bitboards[offset + KNIGHT])
+                     | (KING_TABLE[sq] & bitboards[offset + KING]))
+        diagonal_sliders = (bitboards[offset + BISHOP] | queens) & DIAGONAL_RAYS[sq]
+        if diagonal_sliders:
+            attackers |= diagonal_attacks(sq, occupied) & diagonal_sliders
+        orthogonal_sliders = (bitboards[offset + ROOK] | queens) & ORTHOGONAL_RAYS[sq]
+        if orthogonal_sliders:
+            attackers |= orthogonal_attacks(sq, occupied) & orthogonal_sliders
+        return attackers
+
+    def pin_masks(self, colour):
+        #The pieces of colour pinned to their king, each with the squares it can still move to (the line up to and including the pinner)
+        king_bb = self.bitboards[colour * 6 + KING]
+        if not king_bb:
+            return {}
+        king = king_bb.bit_length() - 1
+        offset = (1 - colour) * 6
+        bitboards = self.bitboards
+        queens = bitboards[offset + QUEEN]
+        pinners = (((bitboards[offset + BISHOP] | queens) & DIAGONAL_RAYS[king])
+                   | ((bitboards[offset + ROOK] | queens) & ORTHOGONAL_RAYS[king]))
+        pins = {}
+        for pinner in squares_of(pinners):
+            line = BETWEEN[king * 64 + pinner]
+            blockers = line & self.occupied
+            if blockers and not blockers & (blockers - 1) and blockers & self.colour_occupancy[colour]:
+                pins[blockers.bit_length() - 1] = line | (1 << pinner)
+        return pins
+
+    def is_checkmate(self, colour):
+        """Checks whether colour is checkmated, stopping at the first legal way out of check. King moves are tried first,
+        then (against a single checker) capturing it and then blocking the line between it and the king. Pinned pieces may
+        only move along their pin. En passant captures are played out as the pawn they remove can uncover another line.
+        """
+        bitboards = self.bitboards
+        offset = colour * 6
+        king_bb = bitboards[offset + KING]
+        if not king_bb:
+            return False
+        king = king_bb.bit_length() - 1
+        enemy = 1 - colour
+        checkers = self.attackers(king, enemy, self.occupied)
+        if not checkers:
+            return False
+
+        #King moves, with the king taken off the board so it cannot hide behind itself on a checking line
+        if KING_TABLE[king] & ~self.colour_occupancy[colour] & ~self.attacks_of(enemy, self.occupied ^ king_bb):
+            return False
+        if checkers & (checkers - 1):
+            return True  # Double check, only the king can move
+
+        checker = checkers.bit_length() - 1
+        pins = self.pin_masks(colour)
+        pawns = bitboards[offset + PAWN]
+        queens = bitboards[offset + QUEEN]
+        diagonal_sliders = bitboards[offset + BISHOP] | queens
+        orthogonal_sliders = bitboards[offset + ROOK] | queens
+        knights = bitboards[offset + KNIGHT]
+        forward = 8 if colour == WHITE else -8
+        double_rank = RANK_4 if colour == WHITE else RANK_5
+        empty = FULL ^ self.occupied
+        for target in (checker, *squares_of(BETWEEN[king * 64 + checker])):
+            target_bit = 1 << target
+            blockers = ((KNIGHT_TABLE[target] & knights)
+                        | (diagonal_attacks(target, self.occupied) & diagonal_sliders)
+                        | (orthogonal_attacks(target, self.occupied) & orthogonal_sliders))
+            if target == checker:
+                blockers |= PAWN_TABLE[enemy][target] & pawns
+            else:
+                push_from = target - forward
+                if 0 <= push_from < 64 and pawns >> push_from & 1:
+                    blockers |= 1 << push_from
+                elif target_bit & double_rank and empty >> push_from & 1 and pawns >> (push_from - forward) & 1:
+                    blockers |= 1 << (push_from - forward)
+            for from_sq in squares_of(blockers):
+                pin = pins.get(from_sq)
+                if pin is None or pin & target_bit:
+                    return False
+
+        if self.en_passant is not None:
+            for from_sq in squares_of(PAWN_TABLE[enemy][self.en_passant] & pawns):
+                undo_record = self.make_move(from_sq | (self.en_passant << 6) | EN_PASSANT)
+                escaped = not self.in_check(colour)
+                self.unmake_move(undo_record)
+                if escaped:
+                    return False
+        return True
+
+    def check_squares(self, colour):
+        #For each piece kind (PAWN to KING), the squares from which a piece of colour would give check to the other king
+        king = self.bitboards[(1 - colour) * 6 + KING]
+        if not king:
+            return [0] * 6
+        king = king.bit_length() - 1
+        diagonal = diagonal_attacks(king, self.occupied)
+        orthogonal = orthogonal_attacks(king, self.occupied)
+        return [PAWN_TABLE[1 - colour][king], KNIGHT_TABLE[king], diagonal, orthogonal, diagonal | orthogonal, 0]
+
+    def checking_moves(self, colour, moves=None):
+        """Returns the legal moves of colour that give check, directly or by discovering a check from a slider behind the piece that moves.
+        moves can be given if the legal moves of colour are already known.
+        """
+        if moves is None:
+            moves = self.legal_moves(colour)
+        enemy_king = self.bitboards[(1 - colour) * 6 + KING]
+        if not enemy_king:
+            return []
+        king = enemy_king.bit_length() - 1
+        bitboards = self.bitboards
+        occupied = self.occupied
+        offset = colour * 6
+        diagonal_sliders = bitboards[offset + BISHOP] | bitboards[offset + QUEEN]
+        orthogonal_sliders = bitboards[offset + ROOK] | bitboards[offset + QUEEN]
+
+        #Our pieces that are the only thing between one of our sliders and the enemy king, with the line they block
+        discoverers = {}
+        for slider in squares_of((diagonal_sliders & DIAGONAL_RAYS[king]) | (orthogonal_sliders & ORTHOGONAL_RAYS[king])):
+            line = BETWEEN[king * 64 + slider]
+            blockers = line & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & self.colour_occupancy[colour]:
+                discoverers[blockers.bit_length() - 1] = line
+
+        checks = []
+        for move in moves:
+            from_sq = move & 63
+            to_sq = (move >> 6) & 63
+            if move & (EN_PASSANT | CASTLE):
+                #The rook of a castle and a pawn taken en passant can also give or uncover check, so play these out
+                undo_record = self.make_move(move)
+                if self.in_check(1 - colour):
+                    checks.append(move)
+                self.unmake_move(undo_record)
+                continue
+            line = discoverers.get(from_sq)
+            if line is not None and not line >> to_sq & 1:
+                checks.append(move)
+                continue
+            kind = (move >> PROMOTION_SHIFT) & 7 or self.index_at(from_sq) - offset
+            if kind == PAWN:
+                gives_check = PAWN_TABLE[colour][to_sq] >> king & 1
+            elif kind == KNIGHT:
+                gives_check = KNIGHT_TABLE[to_sq] >> king & 1
+            elif kind == KING:
+                gives_check = False
+            else:
+                lines = (DIAGONAL_RAYS[king] if kind != ROOK else 0) | (ORTHOGONAL_RAYS[king] if kind != BISHOP else 0)
+                gives_check = lines >> to_sq & 1 and not BETWEEN[king * 64 + to_sq] & (occupied ^ (1 << from_sq))
+            if gives_check:
+                checks.append(move)
+        return checks
+
+    def pseudo_legal_moves(self, colour):
+        #All encoded moves of the side that do not capture its own pieces. King safety is not checked here (apart from castling).
+        moves = []
+        offset = colour * 6
+        own = self.colour_occupancy[colour]
+        enemy = self.colour_occupancy[1 - colour]
+        empty = FULL ^ self.occupied
+        bitboards = self.bitboards
+
+        #Pawns: single and double pushes, diagonal captures, promotions and en passant
+        if colour == WHITE:
+            forward, start_rank, last_rank = NORTH, RANK_2, RANK_8
+        else:
+            forward, start_rank, last_rank = SOUTH, RANK_7, RANK_1
+        pawns = bitboards[offset + PAWN]
+        for from_sq in squares_of(pawns):
+            bb = 1 << from_sq
+            single = shift(bb, forward) & empty
+            targets = single | (PAWN_TABLE[colour][from_sq] & enemy)
+            if bb & start_rank:
+                targets |= shift(single, forward) & empty
+            for to_sq in squares_of(targets):
+                if (1 << to_sq) & last_rank:
+                    for kind in PROMOTION_KINDS:
+                        moves.append(from_sq | (to_sq << 6) | (kind << PROMOTION_SHIFT))
+                else:
+                    moves.append(from_sq | (to_sq << 6))
+        if self.en_passant is not None:
+            for from_sq in squares_of(PAWN_TABLE[1 - colour][self.en_passant] & pawns):
+                moves.append(from_sq | (self.en_passant << 6) | EN_PASSANT)
+
+        for from_sq in squares_of(bitboards[offset + KNIGHT]):
+            for to_sq in squares_of(KNIGHT_TABLE[from_sq] & ~own):
+                moves.append(from_sq | (to_sq << 6))
+
+        occupied = self.occupied
+        for from_sq in squares_of(bitboards[offset + BISHOP]):
+            for to_sq in squares_of(diagonal_attacks(from_sq, occupied) & ~own):
+                moves.append(from_sq | (to_sq << 6))
+        for from_sq in squares_of(bitboards[offset + ROOK]):
+            for to_sq in squares_of(orthogonal_attacks(from_sq, occupied) & ~own):
+                moves.append(from_sq | (to_sq << 6))
+        for from_sq in squares_of(bitboards[offset + QUEEN]):
+            for to_sq in squares_of((diagonal_attacks(from_sq, occupied) | orthogonal_attacks(from_sq, occupied)) & ~own):
+                moves.append(from_sq | (to_sq << 6))
+
+        for from_sq in squares_of(bitboards[offset + KING]):
+            for to_sq in squares_of(KING_TABLE[from_sq] & ~own):
+                moves.append(from_sq | (to_sq << 6))
+        moves.extend(self.castling_moves(colour))
+        return moves
+
+    def castling_moves(self, colour):
+        #Castling needs the right, empty squares between king and rook, and no attacked square on the king's path
+        moves = []
+        if colour == WHITE:
+            rights = ((CASTLE_WHITE_KING, "e1", "g1", ("f1", "g1"), ("e1", "f1", "g1")),
+                      (CASTLE_WHITE_QUEEN, "e1", "c1", ("b1", "c1", "d1"), ("e1", "d1", "c1")))
+        else:
+            rights = ((CASTLE_BLACK_KING, "e8", "g8", ("f8", "g8"), ("e8", "f8", "g8")),
+                      (CASTLE_BLACK_QUEEN, "e8", "c8", ("b8", "c8", "d8"), ("e8", "d8", "c8")))
+        for right, king_from, king_to, between, king_path in rights:
+            if not self.castling & right:
+                continue
+            if any(self.occupied & (1 << SQUARE_INDEX[name]) for name in between):
+                continue
+            if any(self.is_attacked(SQUARE_INDEX[name], 1 - colour) for name in king_path):
+                continue
+            moves.append(SQUARE_INDEX[king_from] | (SQUARE_INDEX[king_to] << 6) | CASTLE)
+        return moves
+
+    def legal_moves(self, colour):
+        """Pseudo legal moves that do not leave the side's own king in check. Kings can never be captured.
+        The king may go to any square the other side does not attack. When in check the other pieces must capture
+        the checker or block its line, and pinned pieces may only move along their pin. En passant is played out.
+        """
+        legal = []
+        enemy = 1 - colour
+        enemy_king = self.bitboards[enemy * 6 + KING]
+        king_bb = self.bitboards[colour * 6 + KING]
+        if not king_bb:
+            return [move for move in self.pseudo_legal_moves(colour) if not enemy_king >> ((move >> 6) & 63) & 1]
+        king = king_bb.bit_length() - 1
+        checkers = self.attackers(king, enemy, self.occupied)
+        if not checkers:
+            targets = FULL
+            danger = self.attack_map(enemy)
+        else:
+            if checkers & (checkers - 1):
+                targets = 0  # Double check, only the king can move
+            else:
+                targets = checkers | BETWEEN[king * 64 + checkers.bit_length() - 1]
+            #The king cannot step back along a checking line, so work out the attacks with the king off the board
+            danger = self.attacks_of(enemy, self.occupied ^ king_bb)
+        pins = self.pin_masks(colour)
+        for move in self.pseudo_legal_moves(colour):
+            from_sq = move & 63
+            to_sq = (move >> 6) & 63
+            if enemy_king >> to_sq & 1:
+                continue
+            if from_sq == king:
+                if move & CASTLE or not danger >> to_sq & 1:
+                    legal.append(move)
+            elif move & EN_PASSANT:
+                undo_record = self.make_move(move)
+                if not self.in_check(colour):
+                    legal.append(move)
+                self.unmake_move(undo_record)
+            elif targets >> to_sq & 1 and (from_sq not in pins or pins[from_sq] >> to_sq & 1):
+                legal.append(move)
+        return legal
+
+    def parse_uci(self, colour, uci):
+        #The legal encoded move of the side written in UCI, eg: e7e8q, or None if there is no such move
+        return next((move for move in self.legal_moves(colour) if move_uci(move) == uci), None)
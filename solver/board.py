@@ -0,0 +1,239 @@
+from time import perf_counter
+from .square import SQUARES
+from .stats import CHECKMATE_TEST, MAKE_UNMAKE, MOVE_GENERATION, VERIFICATION, SearchStats
+from .move import Move
+from .piece import Piece
+from .bitboard import Position, COLOUR_INDEX, PIECE_CHARS, CASTLE, EN_PASSANT, squares_of, move_from, move_to, move_promotion, move_uci
+
+#How many moves a search makes between checks of the board's cancel event and search limits
+CANCEL_CHECK_INTERVAL = 1024
+
+
+class SearchCancelled(Exception):
+    """Raised by Board.make_move when the board's cancel event has been set, eg: by the GUI's Cancel button
+    or by another worker process that has already proven a forced mate."""
+
+
+class Board:
+    """The main object of the solver. Board class containing the squares, the bitboard position and the move functions.
+    It has no pygame dependency, the GUI's Board subclass adds the drawing. The pieces and occupied_squares lists are built from the bitboards.
+    The moves made and the time spent generating moves and testing for checkmate are recorded in stats,
+    and the time spent making and unmaking moves too when time_moves is set.
+    A search running on the board can be stopped from another thread or process by setting cancel_event,
+    and is stopped by itself once it uses up its limits (see limits.SearchLimits).
+    """
+    def __init__(self, rows=8, columns=8, fen=None):
+        self.rows = rows
+        self.columns = columns
+        self.squares = SQUARES
+        self.position = Position()
+        self.initial_fen = fen
+        self.king_in_check = False
+        self.verify_moves = False
+        self.forcing_only = False  # Limit the side solving the puzzle to checking moves at every move, not just the mating one
+        self.nodes = 0  # Number of moves made by the searches
+        self.next_check = 0  # Value of nodes at which make_move next checks the cancel event and the limits (see check_limits)
+        self.time_moves = False  # Time every make_move and unmake_move in stats, off unless profiling as it slows the hottest path
+        self.ply = 0  # Moves made on the board and not taken back yet, the ply of the next move made by a search
+        self.stats = SearchStats()  # Statistics of the current or last search (see search.solve)
+        self.best_line = None  # Best line found so far by the running search, for progress displays (see search.solve)
+        self.cancel_event = None  # threading or multiprocessing Event, make_move raises SearchCancelled once it is set
+        self.limits = None  # SearchLimits of the running search (see search.solve), make_move raises SearchLimitReached once one is used up
+        self.limit_reached = None  # "time", "nodes" or "memory" if the last search stopped at a limit, otherwise None
+        self.proven_depth = None  # Most moves the last search proved there is no mate in (iterative deepening), or None
+        self.endgame_tables = None  # EndgameTables the searches look every node with few enough pieces up in, or None
+        self.cached = None  # (nodes, time) of the search whose result the last solve took from the solution cache, or None
+        self.search_memory = 0  # Bytes used by the node store of the last search that keeps one (BFS)
+        if fen is not None:
+            self.add_pieces(fen)
+
+    def add_pieces(self, row_pieces):
+        #Load all pieces into the Board's bitboard position
+        self.position.load_rows(row_pieces)
+        self.ply = 0
+
+    def load_fen(self, fen):
+        #Load a FEN string (the board part on its own is enough)
+        self.position.load_fen(fen)
+        self.ply = 0
+
+    @property
+    def mailbox(self):
+        #The bitboard index of the piece on every square (0 - 63), or None for an empty square
+        return self.position.mailbox
+
+    def piece_on(self, sq):
+        #Builds a Piece for whatever is on the square index (0 - 63), or None if it is empty
+        char = self.position.piece_at(sq)
+        if char is None:
+            return None
+        return Piece(char, "white" if char.isupper() else "black", self.squares[sq])
+
+    @property
+    def pieces(self):
+        #Pieces for drawing and notation, built from the bitboards
+        return [self.piece_on(sq) for sq in squares_of(self.position.occupied)]
+
+    @property
+    def occupied_squares(self):
+        return [self.squares[sq] for sq in squares_of(self.position.occupied)]
+
+    def make_move(self, move):
+        #Plays an encoded move and returns the undo record (it holds the captured piece) for unmake_move
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        if self.time_moves:
+            start = perf_counter()
+            undo_record = self.make_counted_move(move)
+            self.stats.add_time(MAKE_UNMAKE, perf_counter() - start)
+            return undo_record
+        return self.make_counted_move(move)
+
+    def make_counted_move(self, move):
+        #make_move without the checks: counts the node at its ply and plays the move
+        self.nodes += 1
+        try:
+            self.stats.nodes_per_ply[self.ply] += 1
+        except IndexError:  # First move at this ply
+            self.stats.count_node(self.ply)
+        self.ply += 1
+        return self.position.make_move(move)
+
+    def check_limits(self):
+        #Raises SearchCancelled if the cancel event is set, or SearchLimitReached if the search has used up one of its limits.
+        #The next check is CANCEL_CHECK_INTERVAL moves on, or at the node limit if that comes first, so the node limit is exact.
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchCancelled()
+        self.next_check = self.nodes + CANCEL_CHECK_INTERVAL
+        if self.limits is not None:
+            self.limits.check(self.nodes)
+            if self.limits.nodes is not None:
+                self.next_check = min(self.next_check, self.limits.nodes)
+
+    def unmake_move(self, undo_record):
+        #Takes back a move made with make_move
+        if self.time_moves:
+            start = perf_counter()
+            self.ply -= 1
+            self.position.unmake_move(undo_record)
+            self.stats.add_time(MAKE_UNMAKE, perf_counter() - start)
+        else:
+            self.ply -= 1
+            self.position.unmake_move(undo_record)
+
+    def move_uci(self, move):
+        return move_uci(move)
+
+    def notation_move(self, move):
+        #Builds the Move used to display an encoded move in chess notation. Must be called before the move is made.
+        from_sq = move_from(move)
+        to_sq = move_to(move)
+        piece = self.piece_on(from_sq)
+        square_to = self.squares[to_sq]
+        if move & CASTLE:
+            return Move(piece, square_to.x, square_to.y, castle="O-O" if square_to.x == 6 else "O-O-O")
+        promotion = None
+        if move_promotion(move):
+            promotion = PIECE_CHARS[move_promotion(move) + (0 if piece.color == "white" else 6)]
+        if self.position.piece_at(to_sq) is not None or move & EN_PASSANT:
+            if piece.piece_type == "p" or piece.piece_type == "P":
+                return Move(piece, square_to.x, square_to.y, piece.square.x, iscapture=True, promotion=promotion)
+            return Move(piece, square_to.x, square_to.y, iscapture=True)
+        return Move(piece, square_to.x, square_to.y, promotion=promotion)
+
+    def play_moves(self, moves):
+        #Makes a line of encoded moves on the board and returns them as Moves for display. They are not counted as search nodes.
+        notation = []
+        for move in moves:
+            notation.append(self.notation_move(move))
+            self.position.make_move(move)
+        return notation
+                                                            
+    def generate_fen(self):
+        #Generates the board part of the fen string of the current position
+        return self.position.fen()
+
+    def generate_possible_moves(self, current_player):
+        """The most vital function in this project.
+        Generates a list of all legal moves at a given position as encoded moves (see bitboard.encode_move),
+        including castling, en passant and promotions. Sets king_in_check for the current player.
+        """
+        start = perf_counter()
+        colour = COLOUR_INDEX[current_player]
+        self.king_in_check = self.position.in_check(colour)
+        possible_moves = self.position.legal_moves(colour)
+        self.stats.add_time(MOVE_GENERATION, perf_counter() - start)
+        if self.verify_moves:
+            self.check_for_differences(current_player, possible_moves)
+        return possible_moves
+    
+    def generate_checking_moves(self, current_player):
+        """Generates the legal moves of the player that give check, direct or discovered, as encoded moves.
+        Only these can deliver mate. Sets king_in_check for the current player like generate_possible_moves.
+        """
+        start = perf_counter()
+        colour = COLOUR_INDEX[current_player]
+        self.king_in_check = self.position.in_check(colour)
+        possible_moves = self.position.legal_moves(colour)
+        checking_moves = self.position.checking_moves(colour, possible_moves)
+        self.stats.add_time(MOVE_GENERATION, perf_counter() - start)
+        if self.verify_moves:
+            self.check_for_differences(current_player, possible_moves)
+        return checking_moves
+
+    def is_checkmate(self, current_player):
+        """Checks whether the player is checkmated without generating all of its moves (see Position.is_checkmate).
+        Sets king_in_check for the player like generate_possible_moves.
+        """
+        start = perf_counter()
+        colour = COLOUR_INDEX[current_player]
+        self.king_in_check = self.position.in_check(colour)
+        checkmate = self.king_in_check and self.position.is_checkmate(colour)
+        self.stats.add_time(CHECKMATE_TEST, perf_counter() - start)
+        if self.verify_moves and checkmate != (self.king_in_check and not self.generate_possible_moves(current_player)):
+            raise RuntimeError(f"Checkmate test differs from the move generator at {self.position.full_fen(current_player)}")
+        return checkmate
+
+    def check_for_differences(self, current_player, possible_moves):
+        #Debug check of our moves against python-chess (turned on with verify_moves). Raises if the move lists differ.
+        start = perf_counter()
+        try:
+            import chess  # Optional, imported here so the solver starts without it
+        except ImportError:
+            raise RuntimeError("python-chess is needed to verify the move generator")
+        fen = self.position.full_fen(current_player)
+        legal_moves_uci = {move.uci() for move in chess.Board(fen).legal_moves}
+        possible_moves_uci = {move_uci(move) for move in possible_moves}
+        self.stats.add_time(VERIFICATION, perf_counter() - start)
+        if legal_moves_uci != possible_moves_uci:
+            raise RuntimeError(f"Move generator differs from python-chess at {fen}: "
+                               f"missing {sorted(legal_moves_uci - possible_moves_uci)}, extra {sorted(possible_moves_uci - legal_moves_uci)}")
+
+    
+    def convert_to_uci(self, moves):
+
+        x_piece = {
+            0: "a",
+            1: "b",
+            2: "c",
+            3: "d",
+            4: "e",
+            5: "f",
+            6: "g",
+            7: "h"
+        }
+
+        moves_in_uci = []
+        
+        for move in moves:
+            square_from_x = move.piece.square.x
+            letter_from_x = x_piece[square_from_x]
+            square_from_y = move.piece.square.y
+            part1 = f"{letter_from_x}{square_from_y}"
+            letter_to_x = x_piece[move.x]
+            letter_to_y = move.y
+            part2 = f"{letter_to_x}{letter_to_y}"
+            uci = part1+part2
+            moves_in_uci.append((move,uci))
+
+        return moves_in_uci
\ No newline at end of file
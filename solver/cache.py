@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import time
+from .bitboard import COLOUR_INDEX, move_uci
+
+#Default file and size of the solution cache
+DEFAULT_CACHE_PATH = "solutions.sqlite"
+DEFAULT_MAX_ENTRIES = 100000
+#Share of the entries dropped at a time when the cache file is over its max_mb
+EVICTION_FRACTION = 0.1
+#Version of the searches whose results are cached, kept in the file's user_version. Raised whenever a search change fixes
+#wrong results (eg: a mate reported as no mate), and a file from another version is emptied when it is opened.
+CACHE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    fen TEXT NOT NULL,
+    player TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    solution TEXT,
+    nodes INTEGER NOT NULL,
+    time REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (fen, player, depth, algorithm)
+);
+CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+"""
+
+
+def cache_fen(position, player):
+    #The FEN a position is cached under: the board, side to move, castling rights and en passant square, without the move clocks
+    return " ".join(position.full_fen(player).split()[:4])
+
+
+def cache_algorithm(algorithm, iterative=False, forcing_only=False):
+    #The algorithm a result is cached under. Iterative deepening (the shortest mate) and forcing only (checks only)
+    #can give a different answer, so they are part of it. The number of workers is not, the answer is the same.
+    return algorithm + (" iterative" if iterative else "") + (" forcing" if forcing_only else "")
+
+
+class SolutionCache:
+    """Persistent solution cache class containing the results of finished searches in an sqlite file, keyed by the
+    normalised FEN, the side to move, the number of moves and the algorithm (see cache_fen and cache_algorithm).
+    Each entry holds the solution line in UCI (or none for a puzzle proven to have no mate), the nodes searched and the time taken.
+    It keeps at most max_entries entries, and the file within max_mb megabytes if given, dropping the least recently used.
+    Entries written by searches of another CACHE_VERSION are dropped when the file is opened.
+    Returns the path and the number of entries.
+    Eg: <SolutionCache solutions.sqlite 120 entries>
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_mb=None):
+        if max_entries <= 0:
+            raise ValueError(f"solution cache size must be positive, not {max_entries} entries")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_mb = max_mb
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        try:
+            self.connection.executescript(SCHEMA)
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+                with self.connection:
+                    self.connection.execute("DELETE FROM solutions")
+                    self.connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        except sqlite3.DatabaseError as error:  # Eg: a puzzle file given as the cache
+            self.connection.close()
+            raise ValueError(f"{path} is not a solution cache file ({error})") from None
+
+    def __repr__(self):
+        return f"<SolutionCache {self.path} {len(self)} entries>"
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, position, player, depth, algorithm):
+        """Looks up the result for the position with player to move, a mate in depth moves and algorithm (see cache_algorithm).
+        Returns (sequence, nodes, time) with the solution as encoded moves (None if there is no mate), or None if it is not cached.
+        The line is replayed on the position, and an entry whose moves are not legal there is dropped.
+        """
+        key = (cache_fen(position, player), player, depth, algorithm)
+        row = self.connection.execute(
+            "SELECT solution, nodes, time FROM solutions WHERE fen = ? AND player = ? AND depth = ? AND algorithm = ?", key).fetchone()
+        if row is None:
+            return None
+        solution, nodes, seconds = row
+        sequence = None
+        if solution is not None:
+            sequence = self.decode(position, player, solution.split())
+            if sequence is None:
+                with self.connection:
+                    self.connection.execute("DELETE FROM solutions WHERE fen = ? AND player = ? AND depth = ? AND algorithm = ?", key)
+                return None
+        with self.connection:
+            self.connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE fen = ? AND player = ? AND depth = ? AND algorithm = ?", (time.time(),) + key)
+        return sequence, nodes, seconds
+
+    def decode(self, position, player, uci_moves):
+        #The UCI moves as encoded moves, matched against the legal moves along the line, or None if one of them is not legal
+        colour = COLOUR_INDEX[player]
+        sequence = []
+        undo_records = []
+        try:
+            for uci in uci_moves:
+                move = position.parse_uci(colour, uci)
+                if move is None:
+                    return None
+                sequence.append(move)
+                undo_records.append(position.make_move(move))
+                colour = 1 - colour
+        finally:
+            for undo_record in reversed(undo_records):
+                position.unmake_move(undo_record)
+        return sequence
+
+    def put(self, position, player, depth, algorithm, sequence, nodes, seconds):
+        #Stores the result of a finished search (sequence is None for proven no mate), then drops the least recently used entries over the limits
+        solution = " ".join(move_uci(move) for move in sequence) if sequence is not None else None
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_fen(position, player), player, depth, algorithm, solution, nodes, seconds, time.time()))
+            self.evict()
+
+    def evict(self):
+        #Drops the least recently used entries until the cache is within max_entries (and max_mb)
+        extra = len(self) - self.max_entries
+        if extra > 0:
+            self.drop_oldest(extra)
+        if self.max_mb is not None:
+            while len(self) and self.used_bytes() > self.max_mb * 1024 * 1024:
+                self.drop_oldest(max(1, int(len(self) * EVICTION_FRACTION)))
+
+    def drop_oldest(self, count):
+        self.connection.execute(
+            "DELETE FROM solutions WHERE rowid IN (SELECT rowid FROM solutions ORDER BY last_used LIMIT ?)", (count,))
+
+    def used_bytes(self):
+        #Bytes of the file in use. Pages freed by dropped entries are reused, so they are not counted.
+        page_count = self.connection.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - free_pages) * page_size
@@ -0,0 +1,174 @@
+import argparse
+import json
+import sys
+import time
+from .cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_ENTRIES, SolutionCache
+from .endgame import DEFAULT_TABLES_PATH, EndgameTables
+from .limits import SearchLimits
+from .profiling import DEFAULT_PROFILE_DIRECTORY, profile_name, run_profiled
+from .puzzles import iter_puzzles
+from .search import solve
+from .transposition import DEFAULT_MEMORY_MB, TranspositionTable
+
+#Command line names of the search algorithms
+ALGORITHM_NAMES = {
+    "minimax": "Minimax",
+    "ab": "Minimax with AB",
+    "dfs": "DFS",
+    "bfs": "BFS",
+    "pns": "PNS",
+}
+
+
+def solve_puzzle(puzzle, algorithm, workers=1, table=None, iterative=False, forcing_only=False, profile_directory=None, limits=None, cache=None, tables=None):
+    #Solves one puzzle and returns its JSON record. table is the transposition table used by ab, limits the SearchLimits of every solve.
+    #With a profile_directory the solve runs under cProfile and the record gets the path of the profile.
+    #A puzzle stopped at a limit is unsolved, with the limit, the best line found so far and the depth proven to have no mate in the record.
+    #cache is the SolutionCache checked before the search, a result taken from it has the nodes and time of the original search under "cached".
+    #tables are the EndgameTables probed during the search, or None.
+    board = puzzle.board()
+    board.forcing_only = forcing_only
+    board.endgame_tables = tables
+    board.time_moves = profile_directory is not None  # make/unmake are only timed when profiling
+
+    def run():
+        return solve(board, ALGORITHM_NAMES[algorithm], puzzle.number_of_moves, puzzle.player, workers, table, iterative, limits, cache)
+
+    profile_path = None
+    start_time = time.time()
+    if profile_directory is None:
+        best_sequence = run()
+    else:
+        best_sequence, profile_path, _ = run_profiled(run, profile_name(puzzle.id, algorithm), profile_directory)
+    duration_time = time.time() - start_time
+    nodes = board.nodes
+    record = {
+        "id": puzzle.id,
+        "fen": puzzle.fen,
+        "moves": puzzle.number_of_moves,
+        "algorithm": algorithm,
+        "solved": best_sequence is not None,
+        "solution": [board.move_uci(move) for move in best_sequence] if best_sequence else None,
+        "notation": [str(move) for move in board.play_moves(best_sequence)] if best_sequence else None,
+        "limit": board.limit_reached,
+        "best_line": [board.move_uci(move) for move in board.best_line] if board.limit_reached and board.best_line else None,
+        "proven_depth": board.proven_depth,
+        "cached": {"nodes": board.cached[0], "time": round(board.cached[1], 4)} if board.cached else None,
+        "nodes": nodes,
+        "memory": board.search_memory,
+        "time": round(duration_time, 4),
+        "stats": board.stats.as_dict(),
+    }
+    if profile_path is not None:
+        record["profile"] = profile_path
+    return record
+
+
+def write_record(record, output):
+    output.write(json.dumps(record) + "\n")
+    output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Solve chess mate puzzles without the GUI and stream one JSON record per puzzle.")
+    parser.add_argument("paths", nargs="*", default=["-"],
+                        help='Position files, EPD/FEN files, CSV files, directories, or "-" for EPD/FEN lines on stdin (the default)')
+    parser.add_argument("-a", "--algorithm", choices=sorted(ALGORITHM_NAMES), default="ab",
+                        help="Search algorithm (default: ab)")
+    parser.add_argument("-m", "--moves", type=int, default=None,
+                        help="Number of moves to mate for EPD/FEN lines without a dm operation and CSV rows without a moves column")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Worker processes for minimax and ab (splitting the root moves) and bfs (expanding each depth) (default: 1)")
+    parser.add_argument("--hash", type=float, default=DEFAULT_MEMORY_MB, metavar="MB",
+                        help=f"Memory for the ab transposition table in megabytes, per worker (default: {DEFAULT_MEMORY_MB})")
+    parser.add_argument("-i", "--iterative", action="store_true",
+                        help="Search minimax and ab for a mate in 1, 2 ... up to the number of moves and stop at the shortest mate")
+    parser.add_argument("-f", "--forcing", action="store_true",
+                        help="Only try checking moves for the side solving the puzzle, for mate-by-checks puzzles (dfs, minimax, ab, pns)")
+    #The options that enable a file or directory do not take it as an optional value, since it would take a puzzle path after them.
+    #--cache-file, --tables-file and --profile-dir give it instead, and enable the option too.
+    parser.add_argument("--profile", action="store_const", const=DEFAULT_PROFILE_DIRECTORY, default=None,
+                        help="Run every solve under cProfile and write <puzzle>-<algorithm>.pstats and a .prof.log summary "
+                             f"to {DEFAULT_PROFILE_DIRECTORY}. Worker processes are not profiled")
+    parser.add_argument("--profile-dir", dest="profile", metavar="DIR", help="--profile, writing the profiles to DIR")
+    parser.add_argument("--time", type=float, default=None, metavar="SECONDS",
+                        help="Stop each puzzle after this many seconds and report it unsolved within the budget")
+    parser.add_argument("--nodes", type=int, default=None, metavar="N",
+                        help="Stop each puzzle after N nodes (moves made), counting the nodes of the workers")
+    parser.add_argument("--memory", type=float, default=None, metavar="MB",
+                        help="Stop each puzzle once the process uses this many megabytes (bfs also keeps its node store within it)")
+    parser.add_argument("--cache", action="store_const", const=DEFAULT_CACHE_PATH, default=None,
+                        help=f"Look every puzzle up in the sqlite solution cache {DEFAULT_CACHE_PATH} before searching "
+                             "and store the results of the searches")
+    parser.add_argument("--cache-file", dest="cache", metavar="FILE", help="--cache, with the cache in FILE")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES, metavar="N",
+                        help=f"Most results kept in the cache, the least recently used are dropped (default: {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument("--tables", action="store_const", const=DEFAULT_TABLES_PATH, default=None,
+                        help=f"Probe the endgame tables in {DEFAULT_TABLES_PATH} at every position with few enough pieces, "
+                             "ending the search there with the fastest mate. Build them with: python build_tables.py KQvK KRvK ...")
+    parser.add_argument("--tables-file", dest="tables", metavar="FILE", help="--tables, with the tables in FILE")
+    parser.add_argument("--shard", default=None, metavar="K/N",
+                        help="Only solve shard K of N (K from 0 to N - 1): a contiguous range of the puzzles of every EPD/FEN/CSV file, "
+                             "read through its memory-mapped offset index (built next to the file as FILE.idx when missing or out of date), "
+                             "and every Nth one of the other puzzles. Eg: run --shard 0/4 to --shard 3/4 on four machines")
+    args = parser.parse_args(argv)
+    if args.moves is not None and args.moves < 1:
+        parser.error("--moves must be at least 1")
+    if args.hash <= 0:
+        parser.error("--hash must be a positive number of megabytes")
+    for name in ("time", "nodes", "memory"):
+        if getattr(args, name) is not None and getattr(args, name) <= 0:
+            parser.error(f"--{name} must be a positive number")
+    limits = None
+    if args.time is not None or args.nodes is not None or args.memory is not None:
+        limits = SearchLimits(args.time, args.nodes, args.memory)
+    shard = None
+    if args.shard is not None:
+        try:
+            shard = tuple(int(part) for part in args.shard.split("/"))
+        except ValueError:
+            shard = ()
+        if len(shard) != 2 or not 0 <= shard[0] < shard[1]:
+            parser.error("--shard must be K/N with 0 <= K < N, eg: 0/4")
+    if args.cache_size <= 0:
+        parser.error("--cache-size must be a positive number of entries")
+    tables = None
+    if args.tables is not None:
+        try:
+            tables = EndgameTables(args.tables)
+        except (OSError, ValueError) as error:
+            parser.error(f"--tables: {error}")
+    cache = None
+    if args.cache is not None:
+        try:
+            cache = SolutionCache(args.cache, args.cache_size)
+        except ValueError as error:
+            parser.error(f"--cache: {error}")
+    #One table for the whole run: its keys include the side to move and whose turn it is in the search, so results carry over between puzzles
+    table = TranspositionTable(args.hash) if args.algorithm == "ab" else None
+
+    output = sys.stdout
+    failures = 0
+
+    def on_error(puzzle_id, error):
+        nonlocal failures
+        failures += 1
+        write_record({"id": puzzle_id, "error": str(error)}, output)
+
+    for puzzle in iter_puzzles(args.paths, args.moves, on_error, shard):
+        try:
+            record = solve_puzzle(puzzle, args.algorithm, args.workers, table, args.iterative, args.forcing, args.profile, limits, cache, tables)
+        except (ValueError, KeyError, IndexError) as error:
+            on_error(puzzle.id, error)
+            continue
+        write_record(record, output)
+    if cache is not None:
+        cache.close()
+    if tables is not None:
+        tables.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from itertools import product
+from .bitboard import KING_TABLE, KNIGHT_TABLE, PIECE_CHARS, diagonal_attacks, orthogonal_attacks
+
+#Default file of the endgame tables
+DEFAULT_TABLES_PATH = "endgame.tables"
+#Most pieces (kings included) of a table
+MAX_PIECES = 4
+#Kinds of piece a table can hold, strongest first. Tables are pawnless, so no promotions, en passant or castling.
+PIECE_ORDER = "KQRBN"
+#Probe result of a position that neither side can force mate in (a draw)
+DRAW = -1
+#Stored plies to mate are one byte
+MAX_PLIES = 254
+
+#The white king is mirrored into the a1-d4 quadrant. Mirroring the files (sq ^ 7) and the ranks (sq ^ 56) moves every square,
+#so each position has exactly one form in the table, which keeps the move counters of the retrograde analysis exact.
+QUADRANT = [sq for sq in range(64) if sq % 8 < 4 and sq // 8 < 4]
+QUADRANT_INDEX = {sq: index for index, sq in enumerate(QUADRANT)}
+MIRROR = [(7 if sq % 8 > 3 else 0) | (56 if sq // 8 > 3 else 0) for sq in range(64)]
+
+#Tables file: a header, a directory entry for every table, then the tables, one byte per position
+FILE_MAGIC = b"CPEG"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sII")
+DIRECTORY_ENTRY = struct.Struct("<16sQQ")
+
+
+def material_strength(part):
+    #Orders the material of one side: more pieces first, then stronger ones
+    return len(part), tuple(len(PIECE_ORDER) - PIECE_ORDER.index(kind) for kind in part)
+
+
+def canonical_signature(signature):
+    """The signature a table is stored under and whether the colours have to be swapped to use it.
+    A signature is the pieces of white, "v" and the pieces of black, in PIECE_ORDER. Eg: KQvKN.
+    Tables are kept with the stronger side as white, so KNvKQ is the KQvKN table with the colours swapped.
+    Raises ValueError for a signature that is not pawnless material with one king each and at most MAX_PIECES pieces.
+    """
+    parts = signature.upper().split("V")
+    if len(parts) != 2:
+        raise ValueError(f"Not a material signature: {signature}, eg: KQvK")
+    white, black = ("".join(sorted(part, key=PIECE_ORDER.index)) if set(part) <= set(PIECE_ORDER) else None for part in parts)
+    if white is None or black is None or white.count("K") != 1 or black.count("K") != 1:
+        raise ValueError(f"Not a pawnless signature with one king each: {signature}")
+    if len(white) + len(black) > MAX_PIECES:
+        raise ValueError(f"{signature} has more than {MAX_PIECES} pieces")
+    if material_strength(white) >= material_strength(black):
+        return f"{white}v{black}", False
+    return f"{black}v{white}", True
+
+
+def table_pieces(signature):
+    #The (colour, kind) of every piece of a canonical signature in table order: white's pieces (the king first) then black's
+    white, black = signature.split("v")
+    return [(0, kind) for kind in white] + [(1, kind) for kind in black]
+
+
+def table_size(pieces):
+    return 2 * len(QUADRANT) * 64 ** (len(pieces) - 1)
+
+
+def table_index(side, squares):
+    #Index of a position (the side to move and the square of every piece in table order) after mirroring the white king into the quadrant
+    mask = MIRROR[squares[0]]
+    index = side * len(QUADRANT) + QUADRANT_INDEX[squares[0] ^ mask]
+    for sq in squares[1:]:
+        index = index * 64 + (sq ^ mask)
+    return index
+
+
+def table_position(index, count):
+    #The side to move and squares of the position at a table index (the inverse of table_index)
+    squares = []
+    for _ in range(count - 1):
+        index, sq = divmod(index, 64)
+        squares.append(sq)
+    side, quadrant = divmod(index, len(QUADRANT))
+    squares.append(QUADRANT[quadrant])
+    squares.reverse()
+    return side, squares
+
+
+def piece_attacks(kind, sq, occupied):
+    if kind == "K":
+        return KING_TABLE[sq]
+    if kind == "N":
+        return KNIGHT_TABLE[sq]
+    if kind == "B":
+        return diagonal_attacks(sq, occupied)
+    if kind == "R":
+        return orthogonal_attacks(sq, occupied)
+    return diagonal_attacks(sq, occupied) | orthogonal_attacks(sq, occupied)
+
+
+def attacked(pieces, squares, colour, target, occupied):
+    #Whether a piece of the colour attacks the target square
+    for (piece_colour, kind), sq in zip(pieces, squares):
+        if piece_colour == colour and sq != target and piece_attacks(kind, sq, occupied) >> target & 1:
+            return True
+    return False
+
+
+def capture_signature(pieces, captured):
+    #Signature of the material left after the piece at index captured is taken
+    white = "".join(kind for index, (colour, kind) in enumerate(pieces) if colour == 0 and index != captured)
+    black = "".join(kind for index, (colour, kind) in enumerate(pieces) if colour == 1 and index != captured)
+    return f"{white}v{black}"
+
+
+def lookup(tables, signature, pieces, side, squares):
+    #Plies to mate (see EndgameTables.probe) of a position, given as the pieces of signature (in any order) and their squares,
+    #from tables, a dict of built tables by canonical signature
+    canonical, swap = canonical_signature(signature)
+    order = table_pieces(canonical)
+    if swap:
+        side = 1 - side
+        pieces = [(1 - colour, kind) for colour, kind in pieces]
+        squares = [sq ^ 56 for sq in squares]
+    remaining = list(zip(pieces, squares))
+    ordered = []
+    for piece in order:
+        match = next(i for i, (other, _) in enumerate(remaining) if other == piece)
+        ordered.append(remaining.pop(match)[1])
+    value = tables[canonical][table_index(side, ordered)]
+    return DRAW if value == 0 else value - 1
+
+
+def build_table(signature, tables, progress=None):
+    """Builds the distance to mate table of a canonical signature by retrograde analysis. tables holds the tables of every
+    signature a capture can lead to (see required_signatures). Each byte is 0 for a draw (or an impossible position)
+    or the plies to mate plus one: odd plies when the side to move mates, even plies when it is mated.
+    First every position gets its mates, its results through captures and a count of its other moves. Then, a ply at a time,
+    the positions one quiet move before a loss are wins, and those whose moves all lead to wins for the opponent are losses.
+    Returns the table as a bytearray.
+    """
+    pieces = table_pieces(signature)
+    count = len(pieces)
+    size = table_size(pieces)
+    values = bytearray(size)
+    counters = bytearray(size)  # Moves of a position whose result is not known yet
+    loss_plies = bytearray(size)  # Longest loss seen through the moves already known to lose
+    buckets = [[] for _ in range(MAX_PLIES + 2)]
+    kings = [index for index, (_, kind) in enumerate(pieces) if kind == "K"]
+    colours = [colour for colour, _ in pieces]
+    kinds = [kind for _, kind in pieces]
+
+    #Every position: mates, captures into the smaller tables and the number of quiet moves
+    index = -1
+    for side in (0, 1):
+        if progress:
+            progress(f"{signature}: moves of {'white' if side == 0 else 'black'} to move")
+        for white_king in QUADRANT:
+            for rest in product(range(64), repeat=count - 1):
+                index += 1
+                squares = (white_king,) + rest
+                if len(set(squares)) != count:
+                    continue
+                own = 0
+                occupied = 0
+                for piece, sq in enumerate(squares):
+                    occupied |= 1 << sq
+                    if colours[piece] == side:
+                        own |= 1 << sq
+                if attacked(pieces, squares, side, squares[kings[1 - side]], occupied):
+                    continue  # The side not to move is in check
+                king = kings[side]
+                quiet = 0
+                blocked = False  # A capture that does not lose, so the position can not be a loss
+                longest = 0
+                legal = False
+                for mover in range(count):
+                    if colours[mover] != side:
+                        continue
+                    targets = piece_attacks(kinds[mover], squares[mover], occupied) & ~own
+                    while targets:
+                        bit = targets & -targets
+                        targets ^= bit
+                        target = bit.bit_length() - 1
+                        captured = squares.index(target) if occupied & bit else None
+                        moved = list(squares)
+                        moved[mover] = target
+                        after = (occupied ^ (1 << squares[mover])) | bit
+                        if captured is None:
+                            if attacked(pieces, moved, 1 - side, moved[king], after):
+                                continue
+                            legal = True
+                            quiet += 1
+                            continue
+                        left = [piece for i, piece in enumerate(pieces) if i != captured]
+                        left_squares = [sq for i, sq in enumerate(moved) if i != captured]
+                        if attacked(left, left_squares, 1 - side, moved[king], after):
+                            continue
+                        legal = True
+                        plies = lookup(tables, capture_signature(pieces, captured), left, 1 - side, left_squares)
+                        if plies == DRAW:
+                            blocked = True
+                        elif plies % 2 == 0:
+                            blocked = True
+                            buckets[plies + 1].append(index)  # The opponent is mated after the capture
+                        else:
+                            longest = max(longest, plies + 1)
+                if not legal:
+                    if attacked(pieces, squares, 1 - side, squares[king], occupied):
+                        buckets[0].append(index)  # Checkmate
+                    continue  # Otherwise stalemate, a draw
+                counters[index] = quiet + blocked
+                loss_plies[index] = longest
+                if counters[index] == 0:
+                    buckets[longest].append(index)  # Every move is a capture into a lost position
+
+    #Retrograde analysis, one ply at a time
+    for plies in range(MAX_PLIES + 1):
+        bucket = buckets[plies]
+        if progress and bucket:
+            progress(f"{signature}: {len(bucket)} positions at {plies} plies")
+        for index in bucket:
+            if values[index]:
+                continue
+            values[index] = plies + 1
+            side, squares = table_position(index, count)
+            mover = 1 - side  # The side that made the move into this position
+            occupied = 0
+            for sq in squares:
+                occupied |= 1 << sq
+            for piece in range(count):
+                if colours[piece] != mover:
+                    continue
+                origins = piece_attacks(kinds[piece], squares[piece], occupied) & ~occupied
+                while origins:
+                    origin_bit = origins & -origins
+                    origins ^= origin_bit
+                    before = list(squares)
+                    before[piece] = origin_bit.bit_length() - 1
+                    before_occupied = occupied ^ (1 << squares[piece]) ^ origin_bit
+                    if attacked(pieces, before, mover, before[kings[side]], before_occupied):
+                        continue  # Not a legal position: the side to move here would have been in check with the other side to move
+                    previous = table_index(mover, before)
+                    if values[previous]:
+                        continue
+                    if plies % 2 == 0:
+                        buckets[plies + 1].append(previous)  # A move into a lost position wins
+                    else:
+                        counters[previous] -= 1
+                        if plies + 1 > loss_plies[previous]:
+                            loss_plies[previous] = plies + 1
+                        if counters[previous] == 0:
+                            buckets[loss_plies[previous]].append(previous)  # Every move leads to a win for the opponent
+        buckets[plies] = None
+    if buckets[MAX_PLIES + 1]:
+        raise ValueError(f"{signature} has mates longer than {MAX_PLIES} plies")
+    return values
+
+
+def required_signatures(signature):
+    #The canonical signatures a table needs, the ones its captures lead to first and then itself
+    canonical, _ = canonical_signature(signature)
+    pieces = table_pieces(canonical)
+    required = []
+    for captured, (_, kind) in enumerate(pieces):
+        if kind != "K":
+            for needed in required_signatures(capture_signature(pieces, captured)):
+                if needed not in required:
+                    required.append(needed)
+    required.append(canonical)
+    return required
+
+
+def write_tables(tables, path):
+    #Writes a dict of tables by canonical signature to a tables file, through a temporary file so open maps are not disturbed
+    signatures = sorted(tables)
+    offset = FILE_HEADER.size + DIRECTORY_ENTRY.size * len(signatures)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(signatures)))
+        for signature in signatures:
+            f.write(DIRECTORY_ENTRY.pack(signature.encode(), offset, len(tables[signature])))
+            offset += len(tables[signature])
+        for signature in signatures:
+            f.write(tables[signature])
+    os.replace(temporary_path, path)
+
+
+def build_tables(signatures, path=DEFAULT_TABLES_PATH, progress=None):
+    """Builds the tables of the signatures (and of every smaller signature they need) and writes them to path,
+    keeping the tables already in the file. Returns the signatures of the file.
+    """
+    tables = {}
+    if os.path.exists(path):
+        existing = EndgameTables(path)
+        try:
+            tables = {signature: bytes(existing.table(signature)) for signature in existing.signatures}
+        finally:
+            existing.close()
+    for signature in signatures:
+        for needed in required_signatures(signature):
+            if needed not in tables:
+                start = time.time()
+                tables[needed] = build_table(needed, tables, progress)
+                if progress:
+                    progress(f"{needed}: built in {round(time.time() - start, 1)}s")
+    write_tables(tables, path)
+    return sorted(tables)
+
+
+class EndgameTables:
+    """Endgame tables class containing the distance to mate of every position of some pawnless endings with up to MAX_PIECES pieces,
+    memory-mapped from a tables file written by build_tables, so they are read from disk as they are probed and shared between processes.
+    probe gives the plies to mate of a position in O(1) and mate_line the moves of the fastest mate. Positions with castling rights are not covered.
+    Pickling sends only the path, so the tables can be passed to worker processes.
+    Returns the path and signatures.
+    Eg: <EndgameTables endgame.tables KQvK KQvKQ>
+    """
+    def __init__(self, path=DEFAULT_TABLES_PATH):
+        self.path = path
+        self.open()
+
+    def __repr__(self):
+        return f"<EndgameTables {self.path} {' '.join(self.signatures)}>"
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.open()
+
+    def open(self):
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = FILE_HEADER.unpack_from(self.map) if len(self.map) >= FILE_HEADER.size else (None, None, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            self.map.close()
+            raise ValueError(f"{self.path} is not a version {FILE_VERSION} endgame tables file")
+        self.directory = {}
+        for number in range(count):
+            name, offset, size = DIRECTORY_ENTRY.unpack_from(self.map, FILE_HEADER.size + number * DIRECTORY_ENTRY.size)
+            self.directory[name.rstrip(b"\0").decode()] = (offset, size)
+
+    def close(self):
+        self.map.close()
+
+    @property
+    def signatures(self):
+        return sorted(self.directory)
+
+    def table(self, signature):
+        #The bytes of one table, as a view into the map
+        offset, size = self.directory[signature]
+        return memoryview(self.map)[offset:offset + size]
+
+    def probe(self, position, colour):
+        """Plies to mate of the position with colour to move: odd when the side to move mates in that many plies,
+        even when it is mated in that many (0 is checkmate), DRAW when neither side can force mate.
+        Returns None when the position is not in the tables: too many pieces, pawns, castling rights or a missing table.
+        """
+        occupied = position.occupied
+        if bin(occupied).count("1") > MAX_PIECES or position.castling:
+            return None
+        bitboards = position.bitboards
+        if bitboards[0] or bitboards[6]:
+            return None  # Pawns
+        white = "".join(kind for kind in PIECE_ORDER for _ in range(bin(bitboards[PIECE_CHARS.index(kind)]).count("1")))
+        black = "".join(kind for kind in PIECE_ORDER for _ in range(bin(bitboards[PIECE_CHARS.index(kind.lower())]).count("1")))
+        if white.count("K") != 1 or black.count("K") != 1:
+            return None
+        signature, swap = canonical_signature(f"{white}v{black}")
+        location = self.directory.get(signature)
+        if location is None:
+            return None
+        if swap:
+            white, black = black, white
+        squares = []
+        for table_colour, part in ((0, white), (1, black)):
+            board_colour = 1 - table_colour if swap else table_colour
+            for kind in dict.fromkeys(part):
+                bb = bitboards[PIECE_CHARS.index(kind if board_colour == 0 else kind.lower())]
+                while bb:
+                    bit = bb & -bb
+                    bb ^= bit
+                    sq = bit.bit_length() - 1
+                    squares.append(sq ^ 56 if swap else sq)
+        side = 1 - colour if swap else colour
+        offset, _ = location
+        value = self.map[offset + table_index(side, squares)]
+        return DRAW if value == 0 else value - 1
+
+    def mate_line(self, position, colour):
+        """The moves of the mate from the position with colour to move, as encoded moves: the fastest mate for the winning side and
+        the longest defence for the other. Returns None if the position is not in the tables or neither side can force mate.
+        """
+        plies = self.probe(position, colour)
+        if plies is None or plies == DRAW:
+            return None
+        line = []
+        undo_records = []
+        try:
+            while plies > 0:
+                #A winning move leads to a loss in one ply less, and every move of the losing side to a win in at most one less
+                for move in position.legal_moves(colour):
+                    undo_record = position.make_move(move)
+                    if self.probe(position, 1 - colour) == plies - 1:
+                        break
+                    position.unmake_move(undo_record)
+                else:
+                    return None  # A table a capture leads to is missing
+                line.append(move)
+                undo_records.append(undo_record)
+                colour = 1 - colour
+                plies -= 1
+        finally:
+            for undo_record in reversed(undo_records):
+                position.unmake_move(undo_record)
+        return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build distance to mate endgame tables by retrograde analysis.")
+    parser.add_argument("signatures", nargs="+", help="Pawnless material of up to 4 pieces, white then black. Eg: KQvK KRvK KNvKQ")
+    parser.add_argument("-o", "--output", default=DEFAULT_TABLES_PATH,
+                        help=f"Tables file, the tables already in it are kept (default: {DEFAULT_TABLES_PATH})")
+    args = parser.parse_args(argv)
+    try:
+        for signature in args.signatures:
+            canonical_signature(signature)
+    except ValueError as error:
+        parser.error(str(error))
+    signatures = build_tables(args.signatures, args.output, print)
+    print(f"{args.output}: {' '.join(signatures)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
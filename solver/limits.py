@@ -0,0 +1,68 @@
+import os
+import time
+from .board import SearchCancelled
+
+try:
+    import resource  # Unix only. Without it (and /proc) the memory limit is not checked.
+except ImportError:
+    resource = None
+
+
+class SearchLimitReached(SearchCancelled):
+    """Raised by Board.make_move when the search has used up its time, node or memory budget (see SearchLimits).
+    reason is "time", "nodes" or "memory". It is a SearchCancelled, so code that stops on a cancel stops on it too."""
+    def __init__(self, reason):
+        super().__init__(reason)  # reason is the only argument, so the exception can be sent back from a worker process
+        self.reason = reason
+
+    def __str__(self):
+        return f"search {self.reason} limit reached"
+
+
+def process_memory_mb():
+    #Resident memory of this process in megabytes: the current size where /proc is available, otherwise the peak size, or None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024  # Bytes on macOS, kilobytes elsewhere
+    return None
+
+
+class SearchLimits:
+    """Search limits class containing the budgets of one search: seconds of wall-clock time, nodes (moves made)
+    and megabytes of process memory. None means no limit. search.solve starts the clock, and the board checks the limits
+    every CANCEL_CHECK_INTERVAL moves and when it reaches the node limit, raising SearchLimitReached once one of them is used up.
+    A search stopped by the node limit has made exactly that many moves (with one process).
+    Returns the limits that are set.
+    Eg: <SearchLimits time=10s nodes=1000000>
+    """
+    def __init__(self, time=None, nodes=None, memory_mb=None):
+        self.time = time
+        self.nodes = nodes
+        self.memory_mb = memory_mb
+        self.deadline = None
+
+    def __repr__(self):
+        limits = [f"time={self.time}s" if self.time is not None else None,
+                  f"nodes={self.nodes}" if self.nodes is not None else None,
+                  f"memory={self.memory_mb}MB" if self.memory_mb is not None else None]
+        return "<SearchLimits " + (" ".join(limit for limit in limits if limit) or "none") + ">"
+
+    def start(self):
+        #Starts the clock. The deadline is a wall-clock time, so it also holds in worker processes.
+        self.deadline = time.time() + self.time if self.time is not None else None
+
+    def check(self, nodes):
+        #Raises SearchLimitReached if the search has made nodes moves or is past the deadline or the memory budget
+        if self.nodes is not None and nodes >= self.nodes:
+            raise SearchLimitReached("nodes")
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchLimitReached("time")
+        if self.memory_mb is not None:
+            memory = process_memory_mb()
+            if memory is not None and memory >= self.memory_mb:
+                raise SearchLimitReached("memory")
@@ -1,17 +1,22 @@
 class Move:
-    """Move class containing the piece type, x and y coordinates and if the move is a capture/checkmate.
+    """Move class containing the piece type, x and y coordinates and if the move is a capture/checkmate/castle/promotion.
     Returns a string in chess annotation form.
-    Eg: Ng5, bxc6
+    Eg: Ng5, bxc6, e8=Q, O-O
     """
-    def __init__(self, piece, x, y, from_x = None, iscapture = False, ischeckmate = False):
+    def __init__(self, piece, x, y, from_x = None, iscapture = False, ischeckmate = False, promotion = None, castle = None):
         self.piece = piece
         self.x = x
         self.y = y
         self.capture = iscapture
         self.checkmate = ischeckmate
         self.from_x = from_x
+        self.promotion = promotion
+        self.castle = castle
         
     def __repr__(self):
+        if self.castle:
+            return self.castle
+        promotion = f"={self.promotion}" if self.promotion else ""
         if self.x == 0:
             to_x = "a"
         elif self.x == 1:
@@ -47,11 +52,11 @@ class Move:
             from_x = "h"      
             
         if not self.capture and not self.checkmate and (self.piece.piece_type == "p" or self.piece.piece_type == "P"):
-            return f"{to_x}{self.y+1}"
+            return f"{to_x}{self.y+1}{promotion}"
         if not self.capture and not self.checkmate and (self.piece.piece_type != "p" or self.piece.piece_type != "P"):
             return f"{self.piece.piece_type}{to_x}{self.y+1}"
         if self.capture and not self.checkmate and (self.piece.piece_type == "p" or self.piece.piece_type == "P"):
-            return f"{from_x}x{to_x}{self.y+1}"
+            return f"{from_x}x{to_x}{self.y+1}{promotion}"
         if self.capture and not self.checkmate and (self.piece.piece_type != "p" or self.piece.piece_type != "P"):
             return f"{self.piece.piece_type}x{to_x}{self.y+1}"
         if not self.capture and self.checkmate and (self.piece.piece_type != "p" or self.piece.piece_type != "P"):
@@ -0,0 +1,76 @@
+from .bitboard import EN_PASSANT, KING, PAWN, PROMOTION_SHIFT, QUEEN
+
+#Sort keys of the move classes, highest first. Captures add their MVV-LVA score and quiet moves their history score on top.
+HASH_MOVE_SCORE = 1 << 30
+CHECK_SCORE = 1 << 28
+KING_MOVE_SCORE = 1 << 28
+CAPTURE_SCORE = 1 << 26
+KILLER_SCORE = 1 << 25
+HISTORY_LIMIT = KILLER_SCORE - 2
+#Victim values for MVV-LVA by piece kind (PAWN to KING)
+PIECE_VALUES = (1, 3, 3, 5, 9, 0)
+#Killer moves kept for every ply
+KILLERS_PER_PLY = 2
+
+
+class MoveOrdering:
+    """Move ordering class containing the killer moves of every ply and the history table of the alpha beta search.
+    The solving side tries checks first and the defender tries king moves first. Captures come next, most valuable
+    victim and then least valuable attacker first, then the killer moves of the ply and then the quiet moves by history score.
+    A move that causes a cutoff becomes a killer of its ply and adds the square of the remaining depth to its history score.
+    Returns the number of plies with killer moves.
+    Eg: <MoveOrdering 5 plies>
+    """
+    def __init__(self):
+        self.killers = []
+        self.history = [0] * (2 * 64 * 64)
+
+    def __repr__(self):
+        return f"<MoveOrdering {len(self.killers)} plies>"
+
+    def order(self, position, moves, depth, colour, attacker, hash_move=0):
+        #Returns the moves of colour (the solving side if attacker is True) at the given ply, best first
+        mailbox = position.mailbox
+        killers = self.killers[depth] if depth < len(self.killers) else ()
+        history = self.history
+        history_offset = colour * 4096
+        check_squares = position.check_squares(colour) if attacker else None
+        offset = colour * 6
+        scores = {}
+        for move in moves:
+            to_sq = (move >> 6) & 63
+            kind = mailbox[move & 63] - offset
+            victim = mailbox[to_sq]
+            promotion = (move >> PROMOTION_SHIFT) & 7
+            score = 0
+            if move == hash_move:
+                score = HASH_MOVE_SCORE
+            elif attacker and check_squares[promotion or kind] >> to_sq & 1:
+                score = CHECK_SCORE
+            elif not attacker and kind == KING:
+                score = KING_MOVE_SCORE
+            if move & EN_PASSANT:
+                score += CAPTURE_SCORE + PIECE_VALUES[PAWN] * 16 - kind
+            elif victim is not None:
+                score += CAPTURE_SCORE + PIECE_VALUES[victim % 6] * 16 - kind
+            elif promotion == QUEEN:
+                score += CAPTURE_SCORE + PIECE_VALUES[QUEEN] * 16 - kind
+            elif move in killers:
+                score += KILLER_SCORE + (KILLERS_PER_PLY - killers.index(move))
+            else:
+                score += history[history_offset + (move & 4095)]
+            scores[move] = score
+        return sorted(moves, key=scores.__getitem__, reverse=True)
+
+    def record_cutoff(self, position, move, depth, remaining, colour):
+        #Called when move caused a cutoff at the given ply. Captures are already ordered first so only quiet moves are remembered.
+        if move & EN_PASSANT or position.occupied >> ((move >> 6) & 63) & 1:
+            return
+        while len(self.killers) <= depth:
+            self.killers.append([])
+        killers = self.killers[depth]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLERS_PER_PLY:]
+        index = colour * 4096 + (move & 4095)
+        self.history[index] = min(self.history[index] + remaining * remaining, HISTORY_LIMIT)
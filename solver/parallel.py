@@ -0,0 +1,151 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from .bitboard import COLOUR_INDEX
+from .board import Board, SearchCancelled
+from .limits import SearchLimitReached
+from .arena import DEFAULT_ARENA_MB
+from .search import MATE_SCORE, attacker_moves, bfs, expand_frontier, forced_mate, minimax, minimax_with_AB, root_endgame_mate
+from .ordering import MoveOrdering
+from .transposition import DEFAULT_MEMORY_MB, TranspositionTable
+
+#How often (seconds) the main process checks the board's limits while it waits for the workers
+LIMIT_POLL_INTERVAL = 0.1
+#Set in every worker process by init_worker. Each worker keeps its own transposition table and move ordering for all the root moves it searches.
+cancel_event = None
+worker_table = None
+worker_ordering = None
+#The endgame tables of the search (see Board.endgame_tables), opened again in every worker by init_worker or init_tables_worker
+worker_tables = None
+
+
+def init_worker(event, memory_mb, tables=None):
+    global cancel_event, worker_table, worker_ordering
+    cancel_event = event
+    worker_table = TranspositionTable(memory_mb)
+    worker_ordering = MoveOrdering()
+    init_tables_worker(tables)
+
+
+def init_tables_worker(tables):
+    global worker_tables
+    worker_tables = tables
+
+
+def search_root_move(snapshot, move, max_depth, player, algorithm, forcing_only=False, limits=None):
+    """Worker task: searches the subtree of one root move from a position snapshot (see Position.snapshot).
+    forcing_only and limits are copied to the worker's board (see Board.forcing_only and Board.limits), and so are the endgame tables.
+    Returns (score, sequence, nodes, stats, limit). The score and sequence are None if the search was cancelled,
+    and limit is the reason of the SearchLimitReached if the worker used up one of the limits on its own, otherwise None.
+    """
+    board = Board()
+    board.position.load_snapshot(snapshot)
+    board.forcing_only = forcing_only
+    board.cancel_event = cancel_event  # Set once another worker proves a forced mate
+    board.limits = limits
+    board.endgame_tables = worker_tables
+    try:
+        board.make_move(move)
+        if algorithm == "Minimax":
+            score, sequence = minimax(board, 1, False, max_depth, player, current_sequence=[move])
+        else:
+            score, sequence = minimax_with_AB(board, 1, False, max_depth, player, -MATE_SCORE, MATE_SCORE, current_sequence=[move], table=worker_table, ordering=worker_ordering)
+    except SearchLimitReached as limit:
+        return None, None, board.nodes, board.stats, limit.reason
+    except SearchCancelled:
+        return None, None, board.nodes, board.stats, None
+    return score, sequence, board.nodes, board.stats, None
+
+
+def search_root_parallel(board, number_of_moves, player, algorithm="Minimax with AB", table=None, ordering=None, workers=None):
+    """search.search_root with the root moves split over a process pool. Returns (best score, best sequence).
+    Workers get the position as a compact snapshot and one root move each. As soon as one proves a forced mate
+    the others are cancelled. Otherwise the best score wins, ties going to the earliest root move like the sequential search.
+    The nodes searched by the workers are added to board.nodes and their statistics to board.stats. For AB every worker has its own move ordering and
+    transposition table, the size of table (or the default size if table is None). ordering sorts the root moves.
+    The workers get board.limits, and the main process checks them every LIMIT_POLL_INTERVAL seconds against the nodes of all the workers.
+    """
+    max_depth = number_of_moves + number_of_moves - 1
+    known = root_endgame_mate(board, max_depth, player)
+    if known is not None:
+        return known
+    memory_mb = table.memory_mb if table is not None else DEFAULT_MEMORY_MB
+    possible_moves = attacker_moves(board, 0, max_depth, player)
+    if algorithm != "Minimax" and ordering is not None:
+        possible_moves = ordering.order(board.position, possible_moves, 0, COLOUR_INDEX[player], True)
+    snapshot = board.position.snapshot()
+
+    best_sequence = None
+    best_score = float("-inf")
+    best_index = None
+    event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(event, memory_mb, board.endgame_tables))
+    try:
+        futures = {executor.submit(search_root_move, snapshot, move, max_depth, player, algorithm, board.forcing_only, board.limits): index
+                   for index, move in enumerate(possible_moves)}
+        pending = set(futures)
+        while pending and best_score < MATE_SCORE:
+            done, pending = wait(pending, timeout=LIMIT_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                score, sequence, nodes, stats, limit = future.result()
+                board.nodes += nodes
+                board.stats.merge(stats)
+                if limit is not None:
+                    raise SearchLimitReached(limit)
+                if score is None:
+                    continue
+                index = futures[future]
+                if best_index is None or score > best_score or (score == best_score and index < best_index):
+                    best_score = score
+                    best_sequence = sequence
+                    best_index = index
+                    board.best_line = best_sequence
+            if best_score < MATE_SCORE:
+                board.check_limits()
+    finally:
+        #Once a forced mate is proven (or on an error) stop the running workers and drop the queued root moves
+        event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    return best_score, best_sequence
+
+
+def get_best_move_parallel(board, max_depth, player, algorithm="Minimax with AB", workers=None, table=None):
+    #Runs get_best_move or get_best_move_with_AB with the root moves split over a process pool (see search_root_parallel)
+    return forced_mate(*search_root_parallel(board, max_depth, player, algorithm, table, MoveOrdering(), workers))
+
+
+def expand_frontier_chunk(snapshots, depth, plies, player, forcing_only=False):
+    """Worker task: runs search.expand_frontier on a chunk of BFS frontier snapshots with a fresh board.
+    Returns (children, mate, nodes, stats).
+    """
+    board = Board()
+    board.forcing_only = forcing_only
+    board.endgame_tables = worker_tables
+    children, mate = expand_frontier(board, snapshots, depth, plies, player)
+    return children, mate, board.nodes, board.stats
+
+
+def bfs_parallel(board, max_depth, player, workers=None, memory_mb=DEFAULT_ARENA_MB):
+    """search.bfs with the frontier chunks of every depth expanded by a process pool. The main process keeps the arena and
+    the visited set and merges the results in chunk order, so the line found is the same as with one process.
+    At the last ply the chunks that are still queued are dropped once a mate is found.
+    The nodes searched by the workers are added to board.nodes and their statistics to board.stats.
+    """
+    plies = max_depth + max_depth - 1
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_tables_worker, initargs=(board.endgame_tables,))
+
+    def expand(chunks, depth):
+        futures = [executor.submit(expand_frontier_chunk, chunk, depth, plies, player, board.forcing_only) for chunk in chunks]
+        try:
+            for future in futures:
+                children, mate, nodes, stats = future.result()
+                board.nodes += nodes
+                board.stats.merge(stats)
+                yield children, mate
+        finally:
+            for future in futures:
+                future.cancel()
+
+    try:
+        return bfs(board, max_depth, player, memory_mb, expand)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,19 @@
+class Piece:
+    """Piece class containing the piece_type, color and square object. It has no image, the GUI draws pieces with its own sprites.
+    Returns a string showing the piece type and the square it is in.
+    Eg: Piece (K, <Square (2, 7, 59)>)
+    """
+    __slots__ = ("piece_type", "color", "square")
+
+    def __init__(self, piece_type, color, square):
+        self.piece_type = piece_type
+        self.color = color
+        self.square = square
+        
+    def __repr__(self):
+        return f"Piece ({self.piece_type}, {self.square})"
+    
+    def __eq__(self, other):
+        if isinstance(other, Piece):
+            return self.square == other.square
+        return False
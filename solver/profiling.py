@@ -0,0 +1,37 @@
+import cProfile
+import os
+import pstats
+import re
+
+#Functions listed in the text summary of a profile
+SUMMARY_LINES = 40
+#Where profiles go by default, and the extension of the text summary. Kept apart from the puzzle files (position*.txt),
+#so the batch solver and perft never load a profile as a puzzle.
+DEFAULT_PROFILE_DIRECTORY = "profiles"
+SUMMARY_EXTENSION = ".prof.log"
+
+
+def profile_name(position, algorithm):
+    #File name (without extension) of the profile of one algorithm run. Eg: position6-minimax_with_ab
+    stem = os.path.splitext(os.path.basename(str(position)))[0]
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{stem}-{algorithm}".lower())
+
+
+def run_profiled(function, name, directory=DEFAULT_PROFILE_DIRECTORY):
+    """Runs function() under cProfile and writes name.pstats (for pstats or snakeviz) and name.prof.log, the functions
+    sorted by cumulative time, to directory. Only the calling process is profiled, not worker processes.
+    Returns (what function returned, path of the .pstats file, path of the summary).
+    """
+    os.makedirs(directory, exist_ok=True)
+    stats_path = os.path.join(directory, name + ".pstats")
+    text_path = os.path.join(directory, name + SUMMARY_EXTENSION)
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(function)
+    finally:
+        profiler.dump_stats(stats_path)
+        with open(text_path, "w") as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_LINES)
+    return result, stats_path, text_path
@@ -0,0 +1,464 @@
+import csv
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from itertools import islice
+from .bitboard import COLOUR_INDEX, Position
+from .board import Board
+
+class Puzzle:
+    """Puzzle class containing an id, the FEN string, the player to move and the number of moves to mate.
+    Returns a string with the id and FEN.
+    Eg: <Puzzle position7.txt 4k3/1Q6/5K2/7q/8/8/8/8 w>
+    """
+    def __init__(self, puzzle_id, fen, player, number_of_moves):
+        self.id = puzzle_id
+        self.fen = fen
+        self.player = player
+        self.number_of_moves = number_of_moves
+
+    def __repr__(self):
+        return f"<Puzzle {self.id} {self.fen}>"
+
+    def board(self):
+        #A solver Board set up with the puzzle position
+        board = Board()
+        board.load_fen(self.fen)
+        return board
+
+
+def parse_file(file):
+    #Parses the position file (board, side to move, number of moves) and returns the 3 lines separated and formatted
+    row_pieces = []
+    with open(file, "r") as f:
+        lines = f.readlines()
+
+    # Process the board configuration
+    board_line = lines[0].strip()
+    ranks = board_line.split("/")
+
+    for rank in ranks:
+        split_strings = [char for char in rank]
+        row_pieces.append(split_strings)
+
+    # Process the player and number of moves
+    player = lines[1].strip()
+    number_of_moves = lines[2].strip()
+    
+    return row_pieces, player, number_of_moves
+
+
+def read_position_file(path):
+    #Reads a position file as a Puzzle named after the file
+    row_pieces, player, number_of_moves = parse_file(path)
+    board_line = "/".join("".join(rank) for rank in row_pieces)
+    if int(number_of_moves) < 1:
+        raise ValueError(f"Number of moves must be at least 1, not {number_of_moves}, in: {path}")
+    return Puzzle(os.path.basename(path), board_line + " " + player, player, int(number_of_moves))
+
+
+def epd_operations(operations):
+    #The operand of every EPD operation by its opcode, with the quotes taken off. Eg: dm 2; id "name"; gives {"dm": "2", "id": "name"}
+    result = {}
+    for operation in operations.split(";"):
+        parts = operation.strip().split(None, 1)
+        if len(parts) == 2:
+            result[parts[0]] = parts[1].strip('"')
+    return result
+
+
+def parse_epd_line(line, puzzle_id, default_moves=None):
+    """Parses one EPD or FEN line into a Puzzle, or returns None for blank lines and comments.
+    The number of moves comes from the EPD "dm" (direct mate) operation, eg: 8/8/8/8/8/8/8/8 w - - dm 2; id "name";
+    otherwise default_moves is used. An "id" operation replaces the given puzzle_id.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split(None, 4)
+    if len(fields) < 2 or fields[1] not in ("w", "b"):
+        raise ValueError(f"Not a FEN or EPD line: {line}")
+    fen = " ".join(fields[:4])
+    operations = epd_operations(fields[4] if len(fields) > 4 else "")
+    number_of_moves = int(operations["dm"]) if "dm" in operations else default_moves
+    puzzle_id = operations.get("id", puzzle_id)
+    if number_of_moves is None:
+        raise ValueError(f"No number of moves (dm operation) for: {line}")
+    if number_of_moves < 1:
+        raise ValueError(f"Number of moves must be at least 1, not {number_of_moves}, for: {line}")
+    return Puzzle(puzzle_id, fen, fields[1], number_of_moves)
+
+
+#Column names (in lower case) of CSV puzzle files. The first column found of each is used.
+CSV_ID_COLUMNS = ("id", "puzzleid")
+CSV_FEN_COLUMNS = ("fen",)
+CSV_MOVES_COLUMNS = ("dm", "mate", "moves")
+CSV_THEMES_COLUMN = "themes"
+#Theme that gives the number of moves of a Lichess puzzle
+MATE_THEME = re.compile(r"\bmateIn(\d+)\b")
+
+
+def csv_columns(header):
+    #The index of the id, fen, moves and themes columns of a CSV header row (None for a missing one)
+    names = [name.strip().lstrip("\ufeff").lower() for name in header]
+
+    def find(candidates):
+        return next((names.index(name) for name in candidates if name in names), None)
+
+    columns = {"id": find(CSV_ID_COLUMNS), "fen": find(CSV_FEN_COLUMNS), "moves": find(CSV_MOVES_COLUMNS), "themes": find((CSV_THEMES_COLUMN,))}
+    if columns["fen"] is None:
+        raise ValueError(f"No FEN column in the CSV header: {','.join(header)}")
+    return columns
+
+
+def parse_csv_row(row, columns, puzzle_id, default_moves=None):
+    """Parses one CSV row into a Puzzle, or returns None for a blank row. columns comes from csv_columns.
+    The moves column is the number of moves to mate, or, as in the Lichess puzzle database, a line of UCI moves that starts
+    with the opponent's move setting up the puzzle. Then the puzzle is the position after that move, and the number of moves
+    comes from a mateInN theme, or from the length of the rest of the line. An id column replaces the given puzzle_id.
+    """
+    if not any(field.strip() for field in row):
+        return None
+    try:
+        fen = row[columns["fen"]].strip()
+        moves = row[columns["moves"]].strip() if columns["moves"] is not None else ""
+    except IndexError:
+        raise ValueError(f"Not enough columns in CSV row: {','.join(row)}")
+    if columns["id"] is not None and columns["id"] < len(row) and row[columns["id"]].strip():
+        puzzle_id = row[columns["id"]].strip()
+    fields = fen.split()
+    if len(fields) < 2 or fields[1] not in ("w", "b"):
+        raise ValueError(f"Not a FEN: {fen}")
+    player = fields[1]
+    fen = " ".join(fields[:4])
+    number_of_moves = default_moves
+    if moves.isdigit():
+        number_of_moves = int(moves)
+    elif moves:
+        line = moves.split()
+        position = Position()
+        position.load_fen(fen)
+        move = position.parse_uci(COLOUR_INDEX[player], line[0])
+        if move is None:
+            raise ValueError(f"Illegal setup move {line[0]} in: {fen}")
+        position.make_move(move)
+        player = "b" if player == "w" else "w"
+        fen = " ".join(position.full_fen(player).split()[:4])
+        themes = row[columns["themes"]] if columns["themes"] is not None and columns["themes"] < len(row) else ""
+        mate = MATE_THEME.search(themes)
+        number_of_moves = int(mate.group(1)) if mate else len(line) // 2
+    if number_of_moves is None:
+        raise ValueError(f"No number of moves for: {fen}")
+    if number_of_moves < 1:
+        raise ValueError(f"Number of moves must be at least 1, not {number_of_moves}, for: {fen}")
+    return Puzzle(puzzle_id, fen, player, number_of_moves)
+
+
+def read_csv(stream, source, default_moves=None, on_error=None):
+    """Yields the puzzles of a CSV stream with a header row (see csv_columns), one per row, without reading ahead.
+    Puzzle ids default to source:line_number. Bad rows raise ValueError, or are passed to on_error(puzzle_id, error)
+    and skipped when it is given.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = csv_columns(header)
+    for row in reader:
+        puzzle_id = f"{source}:{reader.line_num}"
+        try:
+            puzzle = parse_csv_row(row, columns, puzzle_id, default_moves)
+        except (ValueError, KeyError) as error:
+            if on_error is None:
+                raise
+            on_error(puzzle_id, error)
+            continue
+        if puzzle is not None:
+            yield puzzle
+
+
+PUZZLE_FILE_TYPES = (".txt", ".epd", ".fen", ".csv")
+#Files that are read a line at a time, and that can have an offset index (see build_index)
+STREAM_FILE_TYPES = (".epd", ".fen", ".csv")
+
+
+def read_epd(stream, source, default_moves=None, on_error=None):
+    """Yields the puzzles of an EPD/FEN stream, one per line. Puzzle ids default to source:line_number.
+    Bad lines raise ValueError, or are passed to on_error(puzzle_id, error) and skipped when it is given.
+    """
+    for line_number, line in enumerate(stream, 1):
+        puzzle_id = f"{source}:{line_number}"
+        try:
+            puzzle = parse_epd_line(line, puzzle_id, default_moves)
+        except (ValueError, KeyError) as error:
+            if on_error is None:
+                raise
+            on_error(puzzle_id, error)
+            continue
+        if puzzle is not None:
+            yield puzzle
+
+
+def read_stream(stream, source, csv_format, default_moves=None, on_error=None):
+    #Yields the puzzles of an EPD/FEN or CSV stream (see read_epd and read_csv)
+    if csv_format:
+        return read_csv(stream, source, default_moves, on_error)
+    return read_epd(stream, source, default_moves, on_error)
+
+
+def iter_puzzles(paths, default_moves=None, on_error=None, shard=None):
+    """Yields the puzzles of every path: position files, EPD/FEN files (.epd, .fen), CSV files (.csv), directories of those files
+    (.txt files are read as position files), or "-" for an EPD/FEN stream on stdin. Files are streamed a line at a time.
+    shard is (number, count) to yield only one of count shards: a contiguous range of the puzzles of every EPD/FEN/CSV file,
+    read through its offset index (see open_index), and every count-th one of the other puzzles.
+    Unreadable puzzles raise, or are passed to on_error(puzzle_id, error) and skipped when it is given.
+    """
+    if shard is not None:
+        number, count = shard
+        for path in paths:
+            if path != "-" and os.path.isfile(path) and path.endswith(STREAM_FILE_TYPES):
+                index = open_index(path, default_moves=default_moves)
+                try:
+                    yield from index.shard(number, count, on_error)
+                finally:
+                    index.close()
+        others = [path for path in paths if path == "-" or not (os.path.isfile(path) and path.endswith(STREAM_FILE_TYPES))]
+        yield from islice(iter_puzzles(others, default_moves, on_error), number, None, count)
+        return
+    for path in paths:
+        if path == "-":
+            yield from read_epd(sys.stdin, "stdin", default_moves, on_error)
+        elif os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(PUZZLE_FILE_TYPES))
+            yield from iter_puzzles([file for file in files if os.path.isfile(file)], default_moves, on_error)
+        elif path.endswith(STREAM_FILE_TYPES):
+            with open(path, "r", newline="") as f:
+                yield from read_stream(f, os.path.basename(path), path.endswith(".csv"), default_moves, on_error)
+        else:
+            try:
+                puzzle = read_position_file(path)
+            except (OSError, ValueError, IndexError) as error:
+                if on_error is None:
+                    raise
+                on_error(os.path.basename(path), error)
+                continue
+            yield puzzle
+
+
+#Offset index files (see build_index): a header, then the byte offset and the line number of every puzzle as 64 bit ints,
+#then a hash table of the puzzle ids with two 64 bit ints per slot, the hash of the id and the row number plus one (0 for an empty slot)
+INDEX_MAGIC = b"CPIX"
+INDEX_VERSION = 1
+#Magic, version, size and modification time (ns) of the puzzle file, number of puzzles and number of hash table slots
+INDEX_HEADER = struct.Struct("<4sIQQQQ")
+
+
+def index_path_of(path):
+    return path + ".idx"
+
+
+def id_hash(puzzle_id):
+    #Stable 64 bit hash of a puzzle id, the same in every process (unlike hash())
+    return int.from_bytes(hashlib.blake2b(puzzle_id.encode(), digest_size=8).digest(), "little")
+
+
+def row_id(line, line_number, source, csv_format, columns=None):
+    #The id of the puzzle on a line of an EPD/FEN or CSV file, without parsing the rest of it, or None for a line without a puzzle
+    text = line.decode().strip()
+    if not text or (not csv_format and text.startswith("#")):
+        return None
+    puzzle_id = f"{source}:{line_number}"
+    if csv_format:
+        row = next(csv.reader([text]), [])
+        if not any(field.strip() for field in row):
+            return None
+        if columns["id"] is not None and columns["id"] < len(row) and row[columns["id"]].strip():
+            puzzle_id = row[columns["id"]].strip()
+        return puzzle_id
+    fields = text.split(None, 4)
+    return epd_operations(fields[4] if len(fields) > 4 else "").get("id", puzzle_id)
+
+
+def build_index(path, index_path=None):
+    """Builds the offset index of an EPD/FEN or CSV puzzle file, streaming it a line at a time, and writes it to index_path
+    (default: the file name with .idx added). Only the ids are read, so bad puzzles are only found when they are loaded.
+    Returns the number of puzzles indexed.
+    """
+    index_path = index_path or index_path_of(path)
+    csv_format = path.endswith(".csv")
+    source = os.path.basename(path)
+    offsets = array("Q")
+    line_numbers = array("Q")
+    hashes = array("Q")
+    columns = None
+    offset = 0
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, 1):
+            if csv_format and columns is None:
+                columns = csv_columns(next(csv.reader([line.decode()])))
+            else:
+                puzzle_id = row_id(line, line_number, source, csv_format, columns)
+                if puzzle_id is not None:
+                    offsets.append(offset)
+                    line_numbers.append(line_number)
+                    hashes.append(id_hash(puzzle_id))
+            offset += len(line)
+        stat = os.fstat(f.fileno())
+
+    #Open addressing with linear probing, at most half full. A duplicate id keeps its first row.
+    slots = 1
+    while slots < 2 * len(offsets):
+        slots *= 2
+    table = array("Q", bytes(16 * slots))
+    for row, hash_value in enumerate(hashes):
+        slot = hash_value & (slots - 1)
+        while table[2 * slot + 1] and table[2 * slot] != hash_value:
+            slot = (slot + 1) & (slots - 1)
+        if not table[2 * slot + 1]:
+            table[2 * slot] = hash_value
+            table[2 * slot + 1] = row + 1
+
+    #Written next to the index and renamed over it, so processes reading the old index are not disturbed
+    temporary_path = index_path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns, len(offsets), slots))
+        offsets.tofile(f)
+        line_numbers.tofile(f)
+        table.tofile(f)
+    os.replace(temporary_path, index_path)
+    return len(offsets)
+
+
+class PuzzleIndex:
+    """Puzzle index class containing a large EPD/FEN or CSV puzzle file and its offset index (see build_index), both memory-mapped.
+    A puzzle is read by row number (index[row]) or by id (index.get(puzzle_id)) with one hash lookup and one line read,
+    without loading the file. Worker processes that open the same files share their pages instead of copying them,
+    and pickling an index only sends its paths, so it can be passed to a process pool.
+    Raises ValueError if the index file is not an index of the puzzle file as it is now (see open_index to rebuild it).
+    Returns the file and the number of puzzles.
+    Eg: <PuzzleIndex lichess_puzzles.csv 3500000 puzzles>
+    """
+    def __init__(self, path, index_path=None, default_moves=None):
+        self.path = path
+        self.index_path = index_path or index_path_of(path)
+        self.default_moves = default_moves
+        self.open()
+
+    def __repr__(self):
+        return f"<PuzzleIndex {os.path.basename(self.path)} {len(self)} puzzles>"
+
+    def __len__(self):
+        return self.rows
+
+    def __getstate__(self):
+        return {"path": self.path, "index_path": self.index_path, "default_moves": self.default_moves}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.open()
+
+    def open(self):
+        self.source = os.path.basename(self.path)
+        self.csv_format = self.path.endswith(".csv")
+        with open(self.index_path, "rb") as f:
+            self.index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.index_map) < INDEX_HEADER.size:
+            self.close()
+            raise ValueError(f"{self.index_path} is not a puzzle index")
+        magic, version, size, mtime, self.rows, self.slots = INDEX_HEADER.unpack_from(self.index_map)
+        stat = os.stat(self.path)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"{self.index_path} is not a version {INDEX_VERSION} puzzle index")
+        if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+            self.close()
+            raise ValueError(f"{self.index_path} is out of date, {self.path} has changed since it was built")
+        start = INDEX_HEADER.size
+        self.offsets = memoryview(self.index_map)[start:start + 8 * self.rows].cast("Q")
+        self.line_numbers = memoryview(self.index_map)[start + 8 * self.rows:start + 16 * self.rows].cast("Q")
+        self.table = memoryview(self.index_map)[start + 16 * self.rows:start + 16 * (self.rows + self.slots)].cast("Q")
+        self.data = None
+        self.columns = None
+        if stat.st_size:
+            with open(self.path, "rb") as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.csv_format:
+                try:
+                    self.columns = csv_columns(next(csv.reader([self.data[:self.data.find(b"\n")].decode().rstrip("\r")])))
+                except ValueError:
+                    self.close()
+                    raise
+
+    def close(self):
+        #The views of the index have to be released before the maps can be closed
+        for name in ("offsets", "line_numbers", "table"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        for name in ("index_map", "data"):
+            mapped = self.__dict__.pop(name, None)
+            if mapped is not None:
+                mapped.close()
+
+    def line(self, row):
+        #The text of a row's line in the puzzle file
+        offset = self.offsets[row]
+        end = self.data.find(b"\n", offset)
+        return self.data[offset:end if end >= 0 else len(self.data)].decode().rstrip("\r")
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError(f"puzzle row {row} out of range ({self.rows} puzzles)")
+        puzzle_id = f"{self.source}:{self.line_numbers[row]}"
+        if self.csv_format:
+            return parse_csv_row(next(csv.reader([self.line(row)])), self.columns, puzzle_id, self.default_moves)
+        return parse_epd_line(self.line(row), puzzle_id, self.default_moves)
+
+    def find(self, puzzle_id):
+        #The row of the puzzle with the id, or None
+        if not self.slots:
+            return None
+        hash_value = id_hash(puzzle_id)
+        slot = hash_value & (self.slots - 1)
+        while self.table[2 * slot + 1]:
+            if self.table[2 * slot] == hash_value:
+                row = self.table[2 * slot + 1] - 1
+                #Two ids can share a hash, so the id on the row is checked
+                if row_id(self.line(row).encode(), self.line_numbers[row], self.source, self.csv_format, self.columns) == puzzle_id:
+                    return row
+            slot = (slot + 1) & (self.slots - 1)
+        return None
+
+    def get(self, puzzle_id):
+        #The puzzle with the id, or None if there is none
+        row = self.find(puzzle_id)
+        return self[row] if row is not None else None
+
+    def shard(self, number, count, on_error=None):
+        """Yields the puzzles of shard number (0 to count - 1) of count: a contiguous range of rows, so every worker reads its own part of the file.
+        Bad puzzles raise, or are passed to on_error(puzzle_id, error) and skipped when it is given.
+        """
+        if not 0 <= number < count:
+            raise ValueError(f"shard {number} out of range (0 to {count - 1})")
+        for row in range(self.rows * number // count, self.rows * (number + 1) // count):
+            try:
+                yield self[row]
+            except (ValueError, KeyError) as error:
+                if on_error is None:
+                    raise
+                on_error(f"{self.source}:{self.line_numbers[row]}", error)
+
+
+def open_index(path, index_path=None, default_moves=None):
+    #Opens the PuzzleIndex of a puzzle file, building the index first if it is missing or out of date
+    try:
+        return PuzzleIndex(path, index_path, default_moves)
+    except (OSError, ValueError):
+        build_index(path, index_path)
+        return PuzzleIndex(path, index_path, default_moves)
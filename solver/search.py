@@ -0,0 +1,695 @@
+import sys
+from functools import partial
+from time import perf_counter
+from .bitboard import COLOUR_INDEX, ZOBRIST_SIDE, move_uci
+from .arena import DEFAULT_ARENA_MB, ArenaFull, NodeArena
+from .cache import cache_algorithm
+from .endgame import DRAW, MAX_PIECES
+from .limits import SearchLimitReached
+from .ordering import MoveOrdering
+from .stats import ENDGAME_PROBE, ORDERING, SearchStats
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+#The side that replies to each player
+OPPONENT = {"w": "b", "b": "w"}
+#Minimax score of a line that ends in checkmate (and the negative for one that doesn't)
+MATE_SCORE = 100
+#Mixed into the transposition table key of the nodes where the opponent is to move (see table_key)
+MINIMISING_KEY = 0x9E3779B97F4A7C15
+#Frontier positions per chunk (and per worker task) of the level synchronous BFS
+BFS_CHUNK_SIZE = 256
+
+# ______________________________Checkmate checker_________________________________________
+
+def check_game_over(board, player):
+    #Check if the player is checkmated. Runs at every leaf, so it stops at the first way out of check instead of generating every move.
+    return board.is_checkmate(player)
+
+def endgame_mate(board, depth, max_depth, player, side):
+    """Looks a node up in board.endgame_tables. player is the side solving the puzzle, side the one to move at the node,
+    depth its ply and max_depth the plies of the search. Not used with board.forcing_only, the tables' mates need not be all checks.
+    Returns None if the tables do not cover the position, otherwise (mates, line): whether player forces mate in the plies left
+    and, if so, the moves of the fastest mate.
+    """
+    tables = board.endgame_tables
+    if tables is None or board.forcing_only or bin(board.position.occupied).count("1") > MAX_PIECES:
+        return None
+    start = perf_counter()
+    try:
+        colour = COLOUR_INDEX[side]
+        plies = tables.probe(board.position, colour)
+        if plies is None:
+            return None
+        #Odd plies are a win for the side to move and even ones a loss
+        mates = plies != DRAW and plies % 2 == (1 if side == player else 0) and plies <= max_depth - depth
+        line = tables.mate_line(board.position, colour) if mates else None
+        if mates and line is None:
+            return None  # A table a capture in the line leads to is missing
+        board.stats.endgame_hits += 1
+        return mates, line
+    finally:
+        board.stats.add_time(ENDGAME_PROBE, perf_counter() - start)
+
+def root_endgame_mate(board, max_depth, player):
+    #(score, sequence) of search_root for a root position covered by the endgame tables, or None
+    known = endgame_mate(board, 0, max_depth, player, player)
+    if known is None:
+        return None
+    mates, line = known
+    if mates:
+        board.best_line = line
+        return MATE_SCORE, line
+    return -MATE_SCORE, None
+
+def attacker_moves(board, depth, max_depth, player):
+    #Moves of the side solving the puzzle at a ply (max_depth is in plies). Only a check can mate, so the last move
+    #has to give check, and so does every move of the side when board.forcing_only is set.
+    if depth == max_depth - 1 or board.forcing_only:
+        return board.generate_checking_moves(player)
+    return board.generate_possible_moves(player)
+
+# ______________________________Search algorithms_________________________________________
+# Every algorithm takes the number of moves of the puzzle and the player to move, and returns the solution
+# as a list of encoded moves (see bitboard.encode_move), or None. The board is left in its original position.
+
+def search_root(board, number_of_moves, player, algorithm="Minimax with AB", table=None, ordering=None):
+    """Searches every root move for a mate in number_of_moves with minimax or minimax with AB (using table and the move ordering if given).
+    Returns (best score, best sequence). Stops at the first root move that forces mate, since no other move can score higher.
+    """
+    max_depth = number_of_moves + number_of_moves - 1
+    if table is not None:
+        table.new_search()
+    known = root_endgame_mate(board, max_depth, player)
+    if known is not None:
+        return known
+
+    best_sequence = None
+    best_score = float("-inf")
+
+    possible_moves = attacker_moves(board, 0, max_depth, player)
+    if algorithm != "Minimax" and ordering is not None:
+        possible_moves = ordering.order(board.position, possible_moves, 0, COLOUR_INDEX[player], True)
+
+    for move in possible_moves:
+        undo_record = board.make_move(move)
+        if algorithm == "Minimax":
+            score, sequence = minimax(board, 1, False, max_depth, player, current_sequence=[move])  # Pass first move in the sequence
+        else:
+            score, sequence = minimax_with_AB(board, 1, False, max_depth, player, -MATE_SCORE, MATE_SCORE, current_sequence=[move], table=table, ordering=ordering)
+        board.unmake_move(undo_record)
+        if score > best_score:
+            best_score = score
+            best_sequence = sequence
+            board.best_line = best_sequence
+        if best_score >= MATE_SCORE and best_sequence is not None:
+            break  # Only a mating line ends the search, no other root move can score higher
+    return best_score, best_sequence
+
+def forced_mate(score, sequence):
+    #The line of a search_root result if it forces mate, otherwise None
+    return sequence if score >= MATE_SCORE else None
+
+def get_best_move(board, max_depth, player):
+    #manage the minimax algorithm and return the best sequence of moves, or None if there is no forced mate
+    return forced_mate(*search_root(board, max_depth, player, "Minimax"))
+
+def minimax(board, depth, isMaximising, max_depth, player, current_sequence=[]):
+    # The minimax algoirithm. player is the side solving the puzzle, the opponent is the minimising side.
+    known = endgame_mate(board, depth, max_depth, player, player if isMaximising else OPPONENT[player])
+    if known is not None:
+        mates, line = known
+        return (MATE_SCORE, current_sequence + line) if mates else (-MATE_SCORE, current_sequence)
+
+    if depth >= max_depth:
+        if check_game_over(board, OPPONENT[player]):
+            return MATE_SCORE, current_sequence
+        else:
+            return -MATE_SCORE, current_sequence
+
+    if isMaximising:
+        best_score = float("-inf")
+        best_sequence = None
+
+        possible_moves = attacker_moves(board, depth, max_depth, player)
+        if not possible_moves:  # No moves, or no checks for the last move: no mate
+            return -MATE_SCORE, current_sequence
+
+        for move in possible_moves:
+            #Vital area: make the move, recursively call minimax with the new board state and player, and unmake the move once returned
+            undo_record = board.make_move(move)
+            score, sequence = minimax(board, depth + 1, False, max_depth, player, current_sequence + [move])
+            board.unmake_move(undo_record)
+            if score > best_score:
+                best_score = score
+                best_sequence = sequence
+        return best_score, best_sequence
+
+    else:
+        best_score = float("inf")
+        best_sequence = None
+
+        possible_moves = board.generate_possible_moves(OPPONENT[player])
+        if not possible_moves:  # Checkmate if the defender is in check, otherwise stalemate
+            return (MATE_SCORE if board.king_in_check else -MATE_SCORE), current_sequence
+
+        for move in possible_moves:
+            #Vital area: make the move, recursively call minimax with the new board state and player, and unmake the move once returned
+            undo_record = board.make_move(move)
+            score, sequence = minimax(board, depth + 1, True, max_depth, player, current_sequence + [move])
+            board.unmake_move(undo_record)
+            if score < best_score:
+                best_score = score
+                best_sequence = sequence
+        return best_score, best_sequence
+
+def get_best_move_with_AB(board, max_depth, player, table=None):
+    #Manages the minimax algorithm that has alpha beta pruning. Results are shared through a transposition table (a new one if table is None).
+    #Returns the mating line, or None if there is no forced mate.
+    if table is None:
+        table = TranspositionTable()
+    return forced_mate(*search_root(board, max_depth, player, "Minimax with AB", table, MoveOrdering()))
+
+def iterative_deepening(board, max_depth, player, algorithm="Minimax with AB", table=None, search=search_root):
+    """Iterative deepening mate search. Looks for a mate in 1, then in 2 and so on up to max_depth moves, and returns the first
+    forced mate found, which is the shortest one. With AB the transposition table, killer moves and history are kept over
+    the iterations, so every node tries the best moves of the shallower searches first.
+    search is search_root or parallel.search_root_parallel with its workers.
+    After every depth searched without finding a mate, board.proven_depth is set to it.
+    Returns None if there is no forced mate within max_depth moves.
+    """
+    ordering = None
+    if algorithm == "Minimax with AB":
+        ordering = MoveOrdering()
+        if table is None:
+            table = TranspositionTable()
+    for number_of_moves in range(1, max_depth + 1):
+        score, sequence = search(board, number_of_moves, player, algorithm, table, ordering)
+        if score >= MATE_SCORE and sequence is not None:
+            return sequence
+        if not board.forcing_only:  # With only checks searched, no mate found is not a proof there is none
+            board.proven_depth = number_of_moves
+    return None
+
+def table_key(board, isMaximising, player):
+    #Transposition table key of a node: the position, the side to move and whether that side is the one solving the puzzle
+    if isMaximising:
+        return board.position.hash_key(COLOUR_INDEX[player])
+    return board.position.hash_key(COLOUR_INDEX[OPPONENT[player]]) ^ MINIMISING_KEY
+
+def leaf_score(board, player):
+    #Score of a node at the maximum depth: whether the opponent is checkmated
+    if check_game_over(board, OPPONENT[player]):
+        return MATE_SCORE
+    return -MATE_SCORE
+
+def table_line(board, table, depth, isMaximising, max_depth, player, score):
+    """Rebuilds the rest of the line behind a transposition table hit by following the stored best moves.
+    Every entry on the way, down to the last position, must have the same score, so the line is the one the search found.
+    Returns (found, line), the line ending where the search ended, at the last ply or a node without moves.
+    found is False if an entry is missing or was replaced, and the node has to be searched.
+    """
+    line = []
+    undo_records = []
+    try:
+        while depth < max_depth:
+            entry = table.probe(table_key(board, isMaximising, player), max_depth - depth)
+            if entry is None or entry[1] != score:
+                return False, None
+            move = entry[2]
+            if not move:
+                return True, line
+            undo_records.append(board.make_move(move))
+            line.append(move)
+            depth += 1
+            isMaximising = not isMaximising
+        entry = table.probe(table_key(board, isMaximising, player), 0)
+        if entry is None:
+            return leaf_score(board, player) == score, line
+        return entry[1] == score, line
+    finally:
+        for undo_record in reversed(undo_records):
+            board.unmake_move(undo_record)
+
+def order_moves(board, possible_moves, depth, colour, isMaximising, table, key, ordering):
+    #Puts the best move stored for the position at any depth first, usually the mating move or the refutation found by a shallower search.
+    #The rest are sorted by the move ordering heuristics when ordering is given.
+    start = perf_counter()
+    hash_move = table.best_move(key) if table is not None else 0
+    if ordering is not None:
+        possible_moves = ordering.order(board.position, possible_moves, depth, colour, isMaximising, hash_move)
+    elif hash_move and hash_move in possible_moves:
+        possible_moves.remove(hash_move)
+        possible_moves.insert(0, hash_move)
+    board.stats.add_time(ORDERING, perf_counter() - start)
+    return possible_moves
+
+def minimax_with_AB(board, depth, isMaximising, max_depth, player, alpha, beta, current_sequence=[], table=None, ordering=None):
+    """Minimax with alpha beta pruning. player is the side solving the puzzle.
+    Results are stored in and looked up from table, and the moves sorted by ordering (a MoveOrdering), if they are given.
+    """
+    key = None
+    remaining = max_depth - depth
+    if table is not None:
+        key = table_key(board, isMaximising, player)
+        entry = table.probe(key, remaining)
+        if entry is not None:
+            bound, score, _ = entry
+            if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                found, line = table_line(board, table, depth, isMaximising, max_depth, player, score)
+                if found:
+                    board.stats.table_hits += 1
+                    return score, current_sequence + line
+        original_alpha, original_beta = alpha, beta
+
+    known = endgame_mate(board, depth, max_depth, player, player if isMaximising else OPPONENT[player])
+    if known is not None:
+        mates, line = known
+        return (MATE_SCORE, current_sequence + line) if mates else (-MATE_SCORE, current_sequence)
+
+    if depth >= max_depth:
+        score = leaf_score(board, player)
+        if table is not None:
+            table.store(key, 0, EXACT, score, 0)
+        return score, current_sequence
+
+    best_move = 0
+    if isMaximising:
+        best_score = float("-inf")
+        best_sequence = None
+
+        colour = COLOUR_INDEX[player]
+        possible_moves = order_moves(board, attacker_moves(board, depth, max_depth, player), depth, colour, True, table, key, ordering)
+        if not possible_moves:  # No moves, or no checks for the last move: no mate
+            best_score, best_sequence = -MATE_SCORE, current_sequence
+
+        for move in possible_moves:
+            undo_record = board.make_move(move)
+            score, sequence = minimax_with_AB(board, depth + 1, False, max_depth, player, alpha, beta, current_sequence + [move], table, ordering)
+            board.unmake_move(undo_record)
+
+            if score > best_score:
+                best_score = score
+                best_sequence = sequence
+                best_move = move
+            alpha = max(alpha, best_score)
+            if beta <= alpha:  # Pruning
+                board.stats.cutoffs += 1
+                if ordering is not None:
+                    ordering.record_cutoff(board.position, move, depth, remaining, colour)
+                break
+
+    else:
+        best_score = float("inf")
+        best_sequence = None
+
+        colour = COLOUR_INDEX[OPPONENT[player]]
+        possible_moves = board.generate_possible_moves(OPPONENT[player])
+        if not possible_moves:  # Checkmate if the defender is in check, otherwise stalemate
+            best_score, best_sequence = (MATE_SCORE if board.king_in_check else -MATE_SCORE), current_sequence
+        possible_moves = order_moves(board, possible_moves, depth, colour, False, table, key, ordering)
+
+        for move in possible_moves:
+            undo_record = board.make_move(move)
+            score, sequence = minimax_with_AB(board, depth + 1, True, max_depth, player, alpha, beta, current_sequence + [move], table, ordering)
+            board.unmake_move(undo_record)
+
+            if score < best_score:
+                best_score = score
+                best_sequence = sequence
+                best_move = move
+            beta = min(beta, best_score)
+            if beta <= alpha:  # Pruning
+                board.stats.cutoffs += 1
+                if ordering is not None:
+                    ordering.record_cutoff(board.position, move, depth, remaining, colour)
+                break
+
+    if table is not None:
+        if not possible_moves:
+            bound = EXACT
+        elif best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table.store(key, remaining, bound, best_score, best_move)
+    return best_score, best_sequence
+
+
+def dfs(board, depth, max_depth, player, sequence=None):
+    #The DFS search algorithm that recursively calls itself until it reaches the limit. player is the side to move at this depth,
+    #the side solving the puzzle at even depths.
+    if sequence is None:
+        sequence = []
+
+    #Any line that ends in mate is a solution, so only a forced mate from the endgame tables ends the search early.
+    #The first mating line found is the solution, and is left in board.best_line for progress displays.
+    known = endgame_mate(board, depth, max_depth + max_depth - 1, player if depth % 2 == 0 else OPPONENT[player], player)
+    if known is not None and known[0]:
+        board.best_line = list(sequence) + known[1]
+        return board.best_line
+
+    if depth >= max_depth + max_depth - 1:
+        if check_game_over(board, player):
+            board.best_line = list(sequence)
+            return board.best_line
+        else:
+            return None
+
+    if depth % 2 == 0:
+        possible_moves = attacker_moves(board, depth, max_depth + max_depth - 1, player)
+    else:
+        possible_moves = board.generate_possible_moves(player)
+
+    for move in possible_moves:
+        sequence.append(move)
+        undo_record = board.make_move(move)
+        result = dfs(board, depth + 1, max_depth, OPPONENT[player], sequence)
+        board.unmake_move(undo_record)
+
+        if result is not None:
+            return result
+        sequence.pop()
+    return None
+
+def expand_frontier(board, snapshots, depth, plies, player):
+    """Expands a chunk of BFS frontier positions (position snapshots) with depth plies played, on the given board.
+    Returns (children, mate). children lists (offset of the parent in the chunk, move, child snapshot).
+    When the children are at the last ply they are tested for mate instead of listed, and mate is (offset, moves)
+    of the first one that mates, or None. A position with a forced mate in the endgame tables gives the moves of that mate.
+    """
+    position = board.position
+    attacker = depth % 2 == 0
+    current_player = player if attacker else OPPONENT[player]
+    leaf = depth + 1 == plies
+    children = []
+    ply = board.ply
+    board.ply = depth  # The moves made here are counted at this ply in board.stats
+    try:
+        for offset, snapshot in enumerate(snapshots):
+            position.load_snapshot(snapshot)
+            known = endgame_mate(board, depth, plies, player, current_player)
+            if known is not None and known[0]:
+                return children, (offset, known[1])
+            if attacker:
+                possible_moves = attacker_moves(board, depth, plies, player)
+            else:
+                possible_moves = board.generate_possible_moves(current_player)
+            for move in possible_moves:
+                undo_record = board.make_move(move)
+                if not leaf:
+                    children.append((offset, move, position.snapshot()))
+                elif check_game_over(board, OPPONENT[current_player]):
+                    board.unmake_move(undo_record)
+                    return children, (offset, [move])
+                board.unmake_move(undo_record)
+        return children, None
+    finally:
+        board.ply = ply
+
+def bfs(board, max_depth, player, memory_mb=DEFAULT_ARENA_MB, expand=None):
+    """Level synchronous breadth first search for a mate in max_depth moves. The frontier of each depth is expanded in chunks
+    of BFS_CHUNK_SIZE positions by expand(chunks, depth), which yields the expand_frontier result of every chunk in order.
+    By default that runs on this board. parallel.bfs_parallel passes one that uses a process pool.
+    New positions are merged in order and dropped if their key, with the side to move, was already seen at any depth.
+    The nodes are kept in a NodeArena (packed positions with a parent index and one move each) and the solution line
+    is rebuilt from the parents. Positions at the last ply are tested for mate when they are reached and never stored.
+    The board's limits are checked after every chunk, and a memory limit smaller than memory_mb becomes the arena's budget.
+    Returns None if there is no solution. Raises SearchLimitReached("memory") if the arena runs out of its budget.
+    The most memory the arena and the visited set used is left in board.search_memory.
+    """
+    plies = max_depth + max_depth - 1
+    position = board.position
+    root = position.snapshot()
+    if expand is None:
+        def expand(chunks, depth):
+            for chunk in chunks:
+                yield expand_frontier(board, chunk, depth, plies, player)
+
+    if board.limits is not None and board.limits.memory_mb is not None:
+        memory_mb = min(memory_mb, board.limits.memory_mb)
+    arena = NodeArena(memory_mb)
+    arena.add(root, -1, 0)
+    visited = {position.hash_key(COLOUR_INDEX[player])}
+    start, end = 0, 1  # Arena indices of the current frontier
+
+    try:
+        for depth in range(plies):
+            side_to_move = COLOUR_INDEX[OPPONENT[player] if depth % 2 == 0 else player]  # In the children
+            chunks = ([arena.snapshot(index) for index in range(chunk_start, min(chunk_start + BFS_CHUNK_SIZE, end))]
+                      for chunk_start in range(start, end, BFS_CHUNK_SIZE))
+            for chunk_number, (children, mate) in enumerate(expand(chunks, depth)):
+                chunk_start = start + chunk_number * BFS_CHUNK_SIZE
+                if mate is not None:
+                    offset, moves = mate
+                    board.best_line = arena.line(chunk_start + offset) + moves
+                    return board.best_line
+                for offset, move, snapshot in children:
+                    key = snapshot[3] ^ ZOBRIST_SIDE[side_to_move]
+                    if key not in visited:
+                        visited.add(key)
+                        arena.add(snapshot, chunk_start + offset, move)
+                board.check_limits()  # The chunks may have been expanded by worker processes, away from this board's make_move
+            start, end = end, len(arena)
+            if start == end:
+                break
+    except ArenaFull:
+        raise SearchLimitReached("memory")
+    finally:
+        board.search_memory = arena.memory_bytes + sys.getsizeof(visited)
+        position.load_snapshot(root)
+
+    return None  # No solution found
+
+#Proof and disproof number of a node that can no longer be proven or disproven
+INFINITE = float("inf")
+#Proof number search stops at its memory limit (see proof_number_search) once it has created this many nodes
+PNS_MAX_NODES = 1000000
+
+class ProofNode:
+    """Proof number search tree node class containing the move that leads to it, its parent, its depth in plies,
+    its proof and disproof numbers and its children once expanded. The legal moves are kept until then.
+    A node solved by the endgame tables keeps the line of its mate instead of children.
+    The player solving the puzzle is to move at even depths (OR nodes) and the opponent at odd depths (AND nodes).
+    Returns the move and the numbers.
+    Eg: <ProofNode e7c5 pn=1 dn=3>
+    """
+    def __init__(self, move, parent, depth):
+        self.move = move
+        self.parent = parent
+        self.depth = depth
+        self.proof = 1
+        self.disproof = 1
+        self.moves = None
+        self.children = None
+        self.line = None
+
+    def __repr__(self):
+        move = move_uci(self.move) if self.move is not None else "root"
+        return f"<ProofNode {move} pn={self.proof} dn={self.disproof}>"
+
+def evaluate_proof_node(board, node, max_depth, player):
+    #Sets the numbers of a new node from its position. Mates, stalemates and lines that run out of moves are solved,
+    #otherwise the number of moves of the side to move is what it takes to disprove (OR node) or prove (AND node) it
+    known = endgame_mate(board, node.depth, max_depth, player, player if node.depth % 2 == 0 else OPPONENT[player])
+    if known is not None:
+        mates, node.line = known
+        node.moves = []
+        node.proof, node.disproof = (0, INFINITE) if mates else (INFINITE, 0)
+    elif node.depth % 2 == 0:
+        node.moves = attacker_moves(board, node.depth, max_depth, player)
+        if node.moves:
+            node.proof, node.disproof = 1, len(node.moves)
+        else:
+            node.proof, node.disproof = INFINITE, 0
+    elif node.depth >= max_depth:
+        node.moves = []
+        if check_game_over(board, OPPONENT[player]):
+            node.proof, node.disproof = 0, INFINITE
+        else:
+            node.proof, node.disproof = INFINITE, 0
+    else:
+        node.moves = board.generate_possible_moves(OPPONENT[player])
+        if not node.moves and board.king_in_check:
+            node.proof, node.disproof = 0, INFINITE
+        elif not node.moves:
+            node.proof, node.disproof = INFINITE, 0
+        else:
+            node.proof, node.disproof = len(node.moves), 1
+
+def set_proof_numbers(node):
+    #Works out the numbers of an expanded node from its children. Returns True if they changed.
+    old_numbers = (node.proof, node.disproof)
+    if node.depth % 2 == 0:
+        node.proof = min(child.proof for child in node.children)
+        node.disproof = sum(child.disproof for child in node.children)
+    else:
+        node.proof = sum(child.proof for child in node.children)
+        node.disproof = min(child.disproof for child in node.children)
+    return (node.proof, node.disproof) != old_numbers
+
+def most_proving_line(node):
+    #The moves from node along the most proving children, the line proof number search would look at next
+    line = []
+    while node.children:
+        if node.depth % 2 == 0:
+            node = min(node.children, key=lambda child: child.proof)
+        else:
+            node = min(node.children, key=lambda child: child.disproof)
+        line.append(node.move)
+    return line
+
+def proof_number_search(board, max_depth, player, max_nodes=PNS_MAX_NODES):
+    """Proof number search for a forced mate within max_depth moves. It keeps expanding the most proving node, the leaf
+    that is cheapest to prove or disprove, so the search goes where the defender has the fewest replies.
+    Returns the solution line or None if there is no mate. Raises SearchLimitReached("memory") once the tree has
+    max_nodes nodes. The most proving line is kept in board.best_line after every expansion, for progress displays
+    and for when the search stops at a limit.
+    """
+    max_depth = max_depth + max_depth - 1
+    root = ProofNode(None, None, 0)
+    evaluate_proof_node(board, root, max_depth, player)
+    node_count = 1
+    node = root
+    undo_records = []  # The moves from the root to node
+
+    try:
+        while root.proof and root.disproof:
+            if node_count >= max_nodes:
+                raise SearchLimitReached("memory")
+            #Select the most proving node: the child with the smallest proof number at OR nodes and disproof number at AND nodes
+            while node.children is not None:
+                if node.depth % 2 == 0:
+                    node = min(node.children, key=lambda child: child.proof)
+                else:
+                    node = min(node.children, key=lambda child: child.disproof)
+                undo_records.append(board.make_move(node.move))
+
+            #Expand it. A proven child solves an OR node and a disproven child an AND node, so the rest are not needed.
+            node.children = []
+            for move in node.moves:
+                child = ProofNode(move, node, node.depth + 1)
+                undo_record = board.make_move(move)
+                evaluate_proof_node(board, child, max_depth, player)
+                board.unmake_move(undo_record)
+                node.children.append(child)
+                node_count += 1
+                if (child.proof if node.depth % 2 == 0 else child.disproof) == 0:
+                    board.stats.cutoffs += 1
+                    break
+            node.moves = None
+
+            #Update the ancestors. Once the numbers stop changing the ones above stay the same, so the next selection starts from there.
+            while set_proof_numbers(node) and node.parent is not None:
+                board.unmake_move(undo_records.pop())
+                node = node.parent
+            board.best_line = most_proving_line(root)
+    except SearchLimitReached:
+        #The node being expanded may be missing children, so its numbers are worked out again before the line is followed
+        if node.children:
+            set_proof_numbers(node)
+        board.best_line = most_proving_line(root)
+        raise
+    finally:
+        for undo_record in reversed(undo_records):
+            board.unmake_move(undo_record)
+    if root.proof != 0:
+        return None
+
+    #Follow a proving child at every node. At AND nodes every child is proven so the first reply is shown.
+    sequence = []
+    node = root
+    while node.children:
+        node = next(child for child in node.children if child.proof == 0)
+        sequence.append(node.move)
+    return sequence + (node.line or [])
+
+# The algorithms by the names used in the GUI and on the command line
+ALGORITHMS = {
+    "Minimax": lambda board, number_of_moves, player: get_best_move(board, number_of_moves, player),
+    "Minimax with AB": lambda board, number_of_moves, player: get_best_move_with_AB(board, number_of_moves, player),
+    "DFS": lambda board, number_of_moves, player: dfs(board, 0, number_of_moves, player),
+    "BFS": lambda board, number_of_moves, player: bfs(board, number_of_moves, player),
+    "PNS": lambda board, number_of_moves, player: proof_number_search(board, number_of_moves, player),
+}
+
+#Algorithms that can split their root moves over worker processes
+PARALLEL_ALGORITHMS = ("Minimax", "Minimax with AB")
+
+def solve(board, algorithm, number_of_moves, player, workers=1, table=None, iterative=False, limits=None, cache=None):
+    """Runs one of the ALGORITHMS and returns its solution line. Minimax, AB and BFS use a process pool when workers > 1,
+    and search for the shortest mate by iterative deepening when iterative is True.
+    table is the TranspositionTable used by AB, so it can be kept between puzzles. Worker processes get their own table of the same size.
+    The statistics of the search are left in board.stats (a new SearchStats).
+    limits is a SearchLimits (time, nodes, memory). If the search uses one up it returns None, the position is put back,
+    and board.limit_reached is set to the limit. board.best_line is then the best line found so far (Minimax, AB)
+    or the most proving line (PNS), and board.proven_depth the most moves there is proven to be no mate in (iterative deepening).
+    When a search covers the whole tree without finding a mate board.proven_depth is number_of_moves, unless board.forcing_only is set.
+    While the search runs board.best_line is the best line found so far: the best root line (Minimax, AB), the most proving
+    line (PNS), or the solution once DFS or BFS finds it, since they stop at the first mate.
+    cache is a SolutionCache looked up before the search and given the result of every search that finishes with a mate
+    or proves there is none.
+    On a hit no search is made and board.cached is (nodes, time) of the search that found the result, otherwise it is None.
+    Raises board.SearchCancelled if the board's cancel_event is set during the search.
+    """
+    board.ply = 0
+    board.best_line = None
+    board.limit_reached = None
+    board.proven_depth = None
+    board.cached = None
+    board.stats = SearchStats()
+    cache_key = cache_algorithm(algorithm, iterative, board.forcing_only)
+    if cache is not None:
+        cached = cache.get(board.position, player, number_of_moves, cache_key)
+        if cached is not None:
+            sequence, nodes, seconds = cached
+            board.cached = (nodes, seconds)
+            if sequence is None and not board.forcing_only:
+                board.proven_depth = number_of_moves
+            return sequence
+    board.limits = limits
+    board.next_check = board.nodes  # The first move checks the new limits
+    root = board.position.snapshot()
+    if limits is not None:
+        limits.start()
+    board.stats.start()
+    try:
+        sequence, proven = run_search(board, algorithm, number_of_moves, player, workers, table, iterative)
+    except SearchLimitReached as limit:
+        board.limit_reached = limit.reason
+        board.position.load_snapshot(root)  # A search stopped between make_move and unmake_move
+        board.ply = 0
+        return None
+    finally:
+        board.stats.stop()
+        board.limits = None
+    if proven and not board.forcing_only:
+        board.proven_depth = number_of_moves
+    if cache is not None and (sequence is not None or proven):  # A search that did not cover the whole tree proves nothing
+        cache.put(board.position, player, number_of_moves, cache_key, sequence, board.nodes, board.stats.elapsed)
+    return sequence
+
+def run_search(board, algorithm, number_of_moves, player, workers=1, table=None, iterative=False):
+    #Runs the algorithm for solve. Returns (solution line, proven): proven is True when the search covered the whole tree
+    #without finding a forced mate, so there is none in number_of_moves. Limits and cancels raise instead of returning.
+    if algorithm in PARALLEL_ALGORITHMS:
+        search = search_root
+        if workers > 1:
+            from .parallel import search_root_parallel
+            search = partial(search_root_parallel, workers=workers)
+        elif algorithm == "Minimax with AB" and table is None:
+            table = TranspositionTable()
+        if iterative:
+            sequence = iterative_deepening(board, number_of_moves, player, algorithm, table, search)
+            return sequence, sequence is None and board.proven_depth == number_of_moves
+        score, sequence = search(board, number_of_moves, player, algorithm, table, MoveOrdering())
+        #Every root move refuted (or none to try). Scores are +-MATE_SCORE, so anything else is a mate.
+        return forced_mate(score, sequence), score <= -MATE_SCORE
+    if algorithm == "BFS" and workers > 1:
+        from .parallel import bfs_parallel
+        sequence = bfs_parallel(board, number_of_moves, player, workers)
+    else:
+        sequence = ALGORITHMS[algorithm](board, number_of_moves, player)
+    #DFS, BFS and PNS return None only once every line has been searched or disproven
+    return sequence, sequence is None
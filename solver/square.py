@@ -1,13 +1,16 @@
 class Square:
     """Square class containing the x, y coordinates and the index of the square.
+    The 64 squares are created once (see SQUARES) and shared by every board, so they only hold their coordinates.
     Returns a string with a clear idea of the Square coordinates and index.
     Eg: <Square (1, 5, 42)>
     """
+    __slots__ = ("x", "y", "idx")
+    size = 70
+
     def __init__(self, x, y, idx):
         self.x = x
         self.y = y
         self.idx = idx
-        self.size = 70
 
     def __repr__(self):
         return f"<Square ({self.x}, {self.y}, {self.idx})>"
@@ -18,7 +21,11 @@ class Square:
         return False
     
     def __hash__(self):
-        return hash((self.x, self.y, self.idx))
+        return hash((self.x, self.y))
     
     def __lt__(self, other):
-        return (self.x, self.y) < (other.x, other.y)
\ No newline at end of file
+        return (self.x, self.y) < (other.x, other.y)
+
+
+#The interned squares by bitboard index (0 - 63): SQUARES[y * 8 + x] is the square (x, y), numbered idx y * 8 + x + 1
+SQUARES = tuple(Square(sq % 8, sq // 8, sq + 1) for sq in range(64))
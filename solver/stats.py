@@ -0,0 +1,104 @@
+import time
+
+#Names of the timed phases of a search
+MOVE_GENERATION = "move generation"
+CHECKMATE_TEST = "checkmate test"
+MAKE_UNMAKE = "make/unmake"
+ORDERING = "move ordering"
+VERIFICATION = "verification"
+ENDGAME_PROBE = "endgame probe"
+
+
+def branching_factor(nodes, depth):
+    #Effective branching factor: the b for which a uniform tree b + b^2 + ... + b^depth has this many nodes
+    if depth <= 0 or nodes <= depth:
+        return 1.0 if nodes else 0.0
+    low, high = 1.0, float(nodes)
+    for _ in range(60):
+        middle = (low + high) / 2
+        total = sum(middle ** ply for ply in range(1, depth + 1))
+        if total < nodes:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class SearchStats:
+    """Search statistics class containing the moves made at every ply (the nodes), the cutoffs, the transposition table
+    and endgame table results used instead of a search, the time spent in each phase and the total time of the search.
+    Filled by the Board the search runs on (see Board.stats), and by the search functions for the cutoffs.
+    Phase times from worker processes are added together, so with workers they can be more than the elapsed time.
+    Returns the node count, the elapsed time and the nodes per second.
+    Eg: <SearchStats 2658 nodes, 0.21s, 12657 nodes/s>
+    """
+    def __init__(self):
+        self.nodes_per_ply = []
+        self.cutoffs = 0
+        self.table_hits = 0
+        self.endgame_hits = 0
+        self.phase_times = {}
+        self.elapsed = 0.0
+        self.start_time = None
+
+    def __repr__(self):
+        return f"<SearchStats {self.nodes} nodes, {round(self.elapsed, 2)}s, {round(self.nodes_per_second)} nodes/s>"
+
+    @property
+    def nodes(self):
+        return sum(self.nodes_per_ply)
+
+    @property
+    def depth(self):
+        return len(self.nodes_per_ply)
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def branching_factor(self):
+        return branching_factor(self.nodes, self.depth)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        if self.start_time is not None:
+            self.elapsed += time.perf_counter() - self.start_time
+            self.start_time = None
+
+    def count_node(self, ply):
+        #Called for every move made at the given ply (0 is a move from the root)
+        while len(self.nodes_per_ply) <= ply:
+            self.nodes_per_ply.append(0)
+        self.nodes_per_ply[ply] += 1
+
+    def add_time(self, phase, seconds):
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+
+    def merge(self, other):
+        #Adds the statistics of another search, eg: one run by a worker process
+        for ply, nodes in enumerate(other.nodes_per_ply):
+            while len(self.nodes_per_ply) <= ply:
+                self.nodes_per_ply.append(0)
+            self.nodes_per_ply[ply] += nodes
+        self.cutoffs += other.cutoffs
+        self.table_hits += other.table_hits
+        self.endgame_hits += other.endgame_hits
+        for phase, seconds in other.phase_times.items():
+            self.add_time(phase, seconds)
+
+    def as_dict(self):
+        #The statistics as plain values for JSON output
+        return {
+            "nodes": self.nodes,
+            "nodes_per_ply": list(self.nodes_per_ply),
+            "time": round(self.elapsed, 4),
+            "nodes_per_second": round(self.nodes_per_second),
+            "branching_factor": round(self.branching_factor, 2),
+            "cutoffs": self.cutoffs,
+            "table_hits": self.table_hits,
+            "endgame_hits": self.endgame_hits,
+            "phase_times": {phase: round(seconds, 4) for phase, seconds in self.phase_times.items()},
+        }
@@ -0,0 +1,108 @@
+from array import array
+
+#Default memory budget of a table in megabytes
+DEFAULT_MEMORY_MB = 16
+#Bytes used by one entry: the 64 bit key plus the 64 bit packed data
+ENTRY_BYTES = 16
+#Entries per bucket: the first slot keeps the deepest result, the second is always replaced
+BUCKET_SIZE = 2
+
+#Bound types. EXACT is the true score, LOWER means the score is at least the stored one (a beta cutoff)
+#and UPPER means it is at most the stored one (no move beat alpha). 0 marks an empty slot.
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+#Layout of the packed data: move in bits 0-16, depth in bits 17-24, bound in bits 25-26,
+#generation in bits 27-34 and the score, offset to be positive, in bits 35-63
+DEPTH_SHIFT = 17
+BOUND_SHIFT = 25
+GENERATION_SHIFT = 27
+SCORE_SHIFT = 35
+MOVE_MASK = (1 << DEPTH_SHIFT) - 1
+SCORE_OFFSET = 1 << 28
+#Stored in place of an infinite score (a node without any legal moves)
+SCORE_INFINITE = SCORE_OFFSET - 1
+
+
+def pack_score(score):
+    if score == float("inf"):
+        return SCORE_OFFSET + SCORE_INFINITE
+    if score == float("-inf"):
+        return SCORE_OFFSET - SCORE_INFINITE
+    return SCORE_OFFSET + score
+
+
+def unpack_score(packed):
+    score = packed - SCORE_OFFSET
+    if score == SCORE_INFINITE:
+        return float("inf")
+    if score == -SCORE_INFINITE:
+        return float("-inf")
+    return score
+
+
+class TranspositionTable:
+    """Fixed size transposition table class containing search results by Zobrist key, packed into two arrays of 64 bit ints
+    so that its memory use is known up front. Each entry stores the remaining depth, the bound type, the score and the best move.
+    Positions map to a bucket of two slots: a result goes in the first slot unless that slot holds a deeper result
+    from the current search, in which case it replaces whatever is in the second slot.
+    Returns the size of the table.
+    Eg: <TranspositionTable 1048576 entries, 16.0 MB>
+    """
+    def __init__(self, memory_mb=DEFAULT_MEMORY_MB):
+        if memory_mb <= 0:
+            raise ValueError(f"transposition table memory must be positive, not {memory_mb} MB")
+        self.memory_mb = memory_mb
+        self.buckets = max(1, int(memory_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SIZE))
+        self.size = self.buckets * BUCKET_SIZE
+        self.clear()
+
+    def __repr__(self):
+        return f"<TranspositionTable {self.size} entries, {round(self.memory_bytes / (1024 * 1024), 2)} MB>"
+
+    @property
+    def memory_bytes(self):
+        return self.size * ENTRY_BYTES
+
+    def clear(self):
+        self.keys = array("Q", bytes(8 * self.size))
+        self.data = array("Q", bytes(8 * self.size))
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        #Ages the stored results so that a new search is free to replace them
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key, depth):
+        #Returns (bound, score, best move) stored for the position at exactly this remaining depth, or None
+        slot = (key % self.buckets) * BUCKET_SIZE
+        keys = self.keys
+        data = self.data
+        for index in range(slot, slot + BUCKET_SIZE):
+            packed = data[index]
+            if keys[index] == key and packed and (packed >> DEPTH_SHIFT) & 0xFF == depth:
+                self.hits += 1
+                return (packed >> BOUND_SHIFT) & 3, unpack_score(packed >> SCORE_SHIFT), packed & MOVE_MASK
+        return None
+
+    def best_move(self, key):
+        #Returns the best move stored for the position at any depth, or 0. Used to order the moves of deeper searches.
+        slot = (key % self.buckets) * BUCKET_SIZE
+        for index in range(slot, slot + BUCKET_SIZE):
+            if self.keys[index] == key and self.data[index] & MOVE_MASK:
+                return self.data[index] & MOVE_MASK
+        return 0
+
+    def store(self, key, depth, bound, score, move):
+        #Saves a search result using the replacement policy described above. move is 0 when the node had no best move.
+        slot = (key % self.buckets) * BUCKET_SIZE
+        stored = self.data[slot]
+        if stored and (stored >> GENERATION_SHIFT) & 0xFF == self.generation and (stored >> DEPTH_SHIFT) & 0xFF > depth:
+            slot += 1
+        self.keys[slot] = key
+        self.data[slot] = (move | (depth << DEPTH_SHIFT) | (bound << BOUND_SHIFT)
+                           | (self.generation << GENERATION_SHIFT) | (pack_score(score) << SCORE_SHIFT))
+        self.stores += 1
@@ -0,0 +1,31 @@
+GAP = 25
+
+class PieceSprite:
+    """Sprite class containing the image of a piece and the rect it is drawn in. Only the GUI builds these,
+    from the position on display, so the solver's pieces never hold pygame objects.
+    Returns a string showing the piece type and where it is drawn.
+    Eg: <PieceSprite K (170, 40)>
+    """
+    __slots__ = ("piece_type", "image", "rect")
+    size = 65  # Square size
+
+    def __init__(self, piece, image):
+        x = piece.square.x
+        y = 7 - piece.square.y
+        # Calculate the center of the square for placing the piece
+        square_center = (GAP + self.size * x + self.size // 2, GAP + self.size * y + self.size // 2)
+        self.piece_type = piece.piece_type
+        self.image = image
+        # Adjust the image position to center it on the square
+        self.rect = image.get_rect(center=square_center)
+
+    def __repr__(self):
+        return f"<PieceSprite {self.piece_type} ({self.rect.x}, {self.rect.y})>"
+
+    def draw(self, screen):
+        screen.blit(self.image, self.rect)
+
+
+def build_sprites(board, images):
+    #One sprite for every piece on the board
+    return [PieceSprite(piece, images[piece.piece_type]) for piece in board.pieces]
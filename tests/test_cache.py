@@ -0,0 +1,97 @@
+import itertools
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from solver import cache as cache_module
+from solver.cache import CACHE_VERSION, SolutionCache, cache_algorithm
+from solver.puzzles import parse_epd_line
+
+MATE_IN_ONE = "k7/8/1K6/8/8/8/8/2Q5 w - -"
+
+
+def puzzle_position(fen):
+    puzzle = parse_epd_line(fen, "test", 1)
+    return puzzle.board().position, puzzle.player
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "solutions.sqlite")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    #last_used comes from this counter, so every use is later than the one before
+    ticks = itertools.count()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: next(ticks)))
+
+
+def test_round_trip(cache_path):
+    position, player = puzzle_position(MATE_IN_ONE)
+    mate = position.parse_uci(0, "c1c8")
+    cache = SolutionCache(cache_path)
+    cache.put(position, player, 1, "DFS", [mate], 12, 0.5)
+    cache.put(position, player, 2, "DFS", None, 300, 1.5)
+    cache.close()
+
+    cache = SolutionCache(cache_path)
+    try:
+        assert len(cache) == 2
+        assert cache.get(position, player, 1, "DFS") == ([mate], 12, 0.5)
+        assert cache.get(position, player, 2, "DFS") == (None, 300, 1.5)
+        assert cache.get(position, player, 1, "BFS") is None
+        assert cache.get(position, player, 1, cache_algorithm("DFS", forcing_only=True)) is None
+    finally:
+        cache.close()
+
+
+def test_illegal_line_is_dropped(cache_path):
+    position, player = puzzle_position(MATE_IN_ONE)
+    cache = SolutionCache(cache_path)
+    try:
+        with cache.connection:
+            cache.connection.execute("INSERT INTO solutions VALUES (?, ?, 1, 'DFS', 'c1c9', 1, 0, 0)", (MATE_IN_ONE, player))
+        assert cache.get(position, player, 1, "DFS") is None
+        assert len(cache) == 0
+    finally:
+        cache.close()
+
+
+def test_other_version_is_emptied(cache_path):
+    position, player = puzzle_position(MATE_IN_ONE)
+    cache = SolutionCache(cache_path)
+    cache.put(position, player, 1, "DFS", None, 1, 0.1)
+    cache.close()
+    connection = sqlite3.connect(cache_path)
+    connection.execute(f"PRAGMA user_version = {CACHE_VERSION - 1}")
+    connection.close()
+
+    cache = SolutionCache(cache_path)
+    try:
+        assert len(cache) == 0
+        assert cache.connection.execute("PRAGMA user_version").fetchone()[0] == CACHE_VERSION
+    finally:
+        cache.close()
+
+
+def test_least_recently_used_is_evicted(cache_path, clock):
+    positions = [puzzle_position(fen) for fen in ("k7/8/1K6/8/8/8/8/3Q4 w - -", "k7/8/1K6/8/8/8/8/4Q3 w - -", "k7/8/1K6/8/8/8/8/5Q2 w - -")]
+    cache = SolutionCache(cache_path, max_entries=2)
+    try:
+        cache.put(*positions[0], 1, "DFS", None, 1, 0.1)
+        cache.put(*positions[1], 1, "DFS", None, 2, 0.1)
+        assert cache.get(*positions[0], 1, "DFS") is not None  # Now used more recently than the second
+        cache.put(*positions[2], 1, "DFS", None, 3, 0.1)
+        assert len(cache) == 2
+        assert cache.get(*positions[0], 1, "DFS") is not None
+        assert cache.get(*positions[1], 1, "DFS") is None
+        assert cache.get(*positions[2], 1, "DFS") is not None
+    finally:
+        cache.close()
+
+
+def test_not_a_cache_file(tmp_path):
+    path = tmp_path / "puzzles.epd"
+    path.write_text(MATE_IN_ONE + " dm 1\n")
+    with pytest.raises(ValueError, match="not a solution cache file"):
+        SolutionCache(str(path))
@@ -0,0 +1,60 @@
+import pytest
+from solver.bitboard import COLOUR_INDEX, Position
+from solver.endgame import DRAW, EndgameTables, build_tables, canonical_signature
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    #KQvK and KRvK (with KvK) take about 20 seconds to build
+    path = str(tmp_path_factory.mktemp("endgame") / "endgame.tables")
+    assert build_tables(["KQvK", "KRvK"], path) == ["KQvK", "KRvK", "KvK"]
+    tables = EndgameTables(path)
+    yield tables
+    tables.close()
+
+
+def probe(tables, fen):
+    position = Position()
+    position.load_fen(fen)
+    return tables.probe(position, COLOUR_INDEX[fen.split()[1]])
+
+
+def test_longest_mates(tables):
+    #Stored values are the plies to mate plus one: KQvK mates in at most 10 moves (20 plies) and KRvK in 16 (32 plies)
+    assert max(tables.table("KQvK")) == 21
+    assert max(tables.table("KRvK")) == 33
+    assert max(tables.table("KvK")) == 0
+
+
+@pytest.mark.parametrize("fen, plies", [
+    ("k7/8/1K6/8/8/8/8/2Q5 w - -", 1),
+    ("k7/8/1K6/8/8/8/8/2R5 w - -", 1),
+    ("k1Q5/8/1K6/8/8/8/8/8 b - -", 0),
+    ("k7/2Q5/8/8/8/8/8/K7 b - -", DRAW),  # Stalemate
+    ("k7/8/8/8/8/8/1K6/8 w - -", DRAW),
+    ("2q5/8/8/8/8/1k6/8/K7 b - -", 1),  # Black's queen, looked up in the KQvK table with the colours swapped
+    ("k7/8/1K6/8/8/8/P7/2Q5 w - -", None),  # Pawns
+    ("4k3/8/8/8/8/8/8/R3K3 w Q -", None),  # Castling rights
+    ("k7/8/1K6/8/8/8/8/2QR4 w - -", None),  # No KQRvK table
+])
+def test_probe(tables, fen, plies):
+    assert probe(tables, fen) == plies
+
+
+def test_mate_line(tables):
+    fen = "8/8/8/8/4k3/8/8/R3K3 w - -"
+    position = Position()
+    position.load_fen(fen)
+    plies = tables.probe(position, 0)
+    line = tables.mate_line(position, 0)
+    assert len(line) == plies
+    for move in line:
+        position.make_move(move)
+    assert position.is_checkmate(0 if plies % 2 == 0 else 1)
+
+
+def test_signatures():
+    assert canonical_signature("KNvKQ") == ("KQvKN", True)
+    assert canonical_signature("kqvk") == ("KQvK", False)
+    with pytest.raises(ValueError):
+        canonical_signature("KPvK")
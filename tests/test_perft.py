@@ -0,0 +1,40 @@
+import glob
+import os
+import pytest
+from perft import SUITE, perft, position_file_fen, python_chess_perft
+
+#Published node counts of the perft suite positions at the suite depth
+KNOWN_COUNTS = {
+    "start": 8902,
+    "kiwipete": 2039,
+    "en passant pins": 43238,
+    "promotions": 9467,
+    "castling": 1486,
+    "middlegame": 2079,
+}
+#The bundled puzzles are next to perft.py
+POSITION_FILES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "position*.txt")))
+
+
+@pytest.mark.parametrize("name, fen, depth", SUITE, ids=[name for name, _, _ in SUITE])
+def test_suite_counts(name, fen, depth):
+    nodes, _ = perft(fen, depth)
+    assert nodes == KNOWN_COUNTS[name]
+
+
+def test_start_position_depths():
+    fen = SUITE[0][1]
+    assert [perft(fen, depth)[0] for depth in range(4)] == [1, 20, 400, 8902]
+
+
+def test_divide_sums_to_total():
+    nodes, divide = perft(SUITE[1][1], 2)
+    assert len(divide) == 48
+    assert sum(divide.values()) == nodes
+
+
+@pytest.mark.parametrize("path", POSITION_FILES, ids=os.path.basename)
+def test_position_files_match_python_chess(path):
+    pytest.importorskip("chess")
+    fen = position_file_fen(path)
+    assert perft(fen, 2) == python_chess_perft(fen, 2)
@@ -0,0 +1,117 @@
+import pytest
+from solver import build_index, iter_puzzles, open_index
+from solver.puzzles import parse_epd_line
+
+EPD_LINES = [
+    "# Mates in one",
+    "k7/8/1K6/8/8/8/8/2Q5 w - - dm 1; id \"queen\";",
+    "k7/8/1K6/8/8/8/8/2R5 w - - dm 1; id \"rook\";",
+    "",
+    "4k3/1Q6/5K2/7q/8/8/8/8 w - - dm 3;",
+    "7k/8/6K1/8/8/8/8/R7 w - - dm 1; id \"corner\";",
+    "7k/8/6K1/8/8/8/8/1R6 w - - dm 1;",
+]
+#A Lichess style CSV: the first move of the line is the opponent's, and the puzzle is the position after it
+CSV_LINES = [
+    "PuzzleId,FEN,Moves,Rating,Themes",
+    "a1,1k6/8/1K6/8/8/8/8/2Q5 b - - 0 1,b8a8 c1c8,600,mate mateIn1 oneMove",
+    "b2,k7/8/1K6/8/8/8/8/2Q5 w - - 0 1,1,700,mate",
+    "c3,7k/8/6K1/8/8/8/8/R7 w - - 0 1,2,800,mate",
+]
+
+
+@pytest.fixture
+def epd_path(tmp_path):
+    path = tmp_path / "puzzles.epd"
+    path.write_text("\n".join(EPD_LINES) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "puzzles.csv"
+    path.write_text("\r\n".join(CSV_LINES) + "\r\n")
+    return str(path)
+
+
+def test_index_rows_and_ids(epd_path):
+    assert build_index(epd_path) == 5
+    index = open_index(epd_path)
+    try:
+        assert len(index) == 5
+        assert [index[row].id for row in range(len(index))] == ["queen", "rook", "puzzles.epd:5", "corner", "puzzles.epd:7"]
+        assert index[-1].id == "puzzles.epd:7"
+        with pytest.raises(IndexError):
+            index[5]
+    finally:
+        index.close()
+
+
+def test_index_get(epd_path):
+    index = open_index(epd_path)
+    try:
+        puzzle = index.get("rook")
+        assert puzzle.fen == "k7/8/1K6/8/8/8/8/2R5 w - -"
+        assert puzzle.number_of_moves == 1
+        assert index.get("puzzles.epd:5").number_of_moves == 3
+        assert index.get("missing") is None
+    finally:
+        index.close()
+
+
+def test_csv_index_get(csv_path):
+    index = open_index(csv_path)
+    try:
+        assert len(index) == 3
+        puzzle = index.get("a1")
+        assert (puzzle.fen, puzzle.player, puzzle.number_of_moves) == ("k7/8/1K6/8/8/8/8/2Q5 w - -", "w", 1)
+        assert index.get("c3").number_of_moves == 2
+        assert index.get("d4") is None
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 7])
+def test_shards_split_the_file_in_order(epd_path, count):
+    index = open_index(epd_path)
+    try:
+        shards = [[puzzle.id for puzzle in index.shard(number, count)] for number in range(count)]
+        all_ids = [index[row].id for row in range(len(index))]
+    finally:
+        index.close()
+    assert [puzzle_id for shard in shards for puzzle_id in shard] == all_ids
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+
+
+def test_shard_out_of_range(epd_path):
+    index = open_index(epd_path)
+    try:
+        with pytest.raises(ValueError):
+            list(index.shard(2, 2))
+    finally:
+        index.close()
+
+
+def test_iter_puzzles_shards(epd_path, csv_path):
+    every_puzzle = [puzzle.id for puzzle in iter_puzzles([epd_path, csv_path])]
+    shards = [[puzzle.id for puzzle in iter_puzzles([epd_path, csv_path], shard=(number, 2))] for number in range(2)]
+    assert sorted(shards[0] + shards[1]) == sorted(every_puzzle)
+    assert shards[0] == ["queen", "rook", "a1"]
+
+
+def test_out_of_date_index_is_rebuilt(epd_path):
+    open_index(epd_path).close()
+    with open(epd_path, "a") as f:
+        f.write("k7/8/1K6/8/8/8/8/3Q4 w - - dm 1; id \"added\";\n")
+    index = open_index(epd_path)
+    try:
+        assert len(index) == 6
+        assert index.get("added").fen == "k7/8/1K6/8/8/8/8/3Q4 w - -"
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("line", ["8/8/8/8/8/8/8/8 x - - dm 1", "k7/8/1K6/8/8/8/8/2Q5 w - - dm 0", "k7/8/1K6/8/8/8/8/2Q5 w - -"])
+def test_bad_epd_lines(line):
+    with pytest.raises(ValueError):
+        parse_epd_line(line, "test")
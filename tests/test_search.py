@@ -0,0 +1,87 @@
+import os
+import pytest
+from solver import Board, SolutionCache, parse_file, solve
+from solver.bitboard import COLOUR_INDEX, Position
+from solver.puzzles import parse_epd_line
+
+ALGORITHMS = ["Minimax", "Minimax with AB", "DFS", "BFS", "PNS"]
+#Algorithms that only return forced mates (DFS returns the first line that ends in mate)
+FORCING_ALGORITHMS = ["Minimax", "Minimax with AB", "PNS"]
+
+
+def solve_epd(line, algorithm, **options):
+    #Solves an EPD puzzle and returns (board, solution in UCI or None)
+    puzzle = parse_epd_line(line, "test")
+    board = puzzle.board()
+    sequence = solve(board, algorithm, puzzle.number_of_moves, puzzle.player, **options)
+    return board, [board.move_uci(move) for move in sequence] if sequence is not None else None
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_mate_in_one(algorithm):
+    board, solution = solve_epd("k7/8/1K6/8/8/8/8/2Q5 w - - dm 1", algorithm)
+    assert solution == ["c1c8"]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_stalemate_is_not_mate(algorithm):
+    #Qc7 leaves black without moves but not in check, and nothing mates in one
+    board, solution = solve_epd("k7/8/8/8/8/8/8/K1Q5 w - - dm 1", algorithm)
+    assert solution is None
+    assert board.proven_depth == 1
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_side_without_moves_has_no_mate(algorithm):
+    board, solution = solve_epd("k7/2Q5/1K6/8/8/8/8/8 b - - dm 1", algorithm)
+    assert solution is None
+    assert board.proven_depth == 1
+
+
+def ends_in_mate(fen, solution):
+    #Whether the UCI line is legal from the position and checkmates at the end
+    position = Position()
+    position.load_fen(fen)
+    colour = COLOUR_INDEX[fen.split()[1]]
+    for uci in solution:
+        move = position.parse_uci(colour, uci)
+        if move is None:
+            return False
+        position.make_move(move)
+        colour = 1 - colour
+    return position.is_checkmate(colour)
+
+
+@pytest.mark.parametrize("algorithm", FORCING_ALGORITHMS)
+def test_mate_shorter_than_stated(algorithm):
+    #Any forced mate within the stated length solves it, a mate in one included
+    fen = "k7/8/1K6/8/8/8/8/2Q5 w - -"
+    board, solution = solve_epd(fen + " dm 2", algorithm)
+    assert solution is not None and len(solution) <= 3
+    assert ends_in_mate(fen, solution)
+
+
+@pytest.mark.parametrize("algorithm", ["Minimax", "Minimax with AB"])
+def test_iterative_deepening_stops_at_shortest_mate(algorithm):
+    board, solution = solve_epd("k7/8/1K6/8/8/8/8/2Q5 w - - dm 3", algorithm, iterative=True)
+    assert solution == ["c1c8"]
+
+
+@pytest.mark.parametrize("algorithm", ["Minimax with AB", "PNS"])
+def test_position10(algorithm):
+    row_pieces, player, number_of_moves = parse_file(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "position10.txt"))
+    board = Board(fen=row_pieces)
+    sequence = solve(board, algorithm, int(number_of_moves), player)
+    assert [board.move_uci(move) for move in sequence] == ["d3h7", "h8h7", "d7g7", "h7h8", "g7h7", "h8g8", "b7g7"]
+
+
+def test_cached_solution(tmp_path):
+    cache = SolutionCache(str(tmp_path / "solutions.sqlite"))
+    try:
+        board, solution = solve_epd("k7/8/1K6/8/8/8/8/2Q5 w - - dm 1", "DFS", cache=cache)
+        assert board.cached is None
+        board, cached_solution = solve_epd("k7/8/1K6/8/8/8/8/2Q5 w - - dm 1", "DFS", cache=cache)
+        assert cached_solution == solution
+        assert board.cached is not None
+    finally:
+        cache.close()
@@ -0,0 +1,53 @@
+import pytest
+from solver.transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+#A 1 KB table has 32 buckets, so keys 32 apart share one
+SMALL_TABLE_MB = 1 / 1024
+
+
+def test_probe_needs_the_exact_depth():
+    table = TranspositionTable(SMALL_TABLE_MB)
+    table.store(12345, 3, EXACT, 100, 777)
+    assert table.probe(12345, 3) == (EXACT, 100, 777)
+    assert table.probe(12345, 2) is None
+    assert table.probe(12345, 4) is None
+    assert table.probe(54321, 3) is None
+
+
+def test_best_move_at_any_depth():
+    table = TranspositionTable(SMALL_TABLE_MB)
+    table.store(12345, 3, LOWER, 100, 777)
+    assert table.best_move(12345) == 777
+    assert table.best_move(54321) == 0
+
+
+@pytest.mark.parametrize("score", [100, -100, 0, float("inf"), float("-inf")])
+def test_scores_round_trip(score):
+    table = TranspositionTable(SMALL_TABLE_MB)
+    table.store(99, 1, UPPER, score, 0)
+    assert table.probe(99, 1) == (UPPER, score, 0)
+
+
+def test_deeper_result_is_kept():
+    table = TranspositionTable(SMALL_TABLE_MB)
+    deep, shallow, other = 5, 5 + table.buckets, 5 + 2 * table.buckets
+    table.store(deep, 6, EXACT, 100, 1)
+    table.store(shallow, 2, EXACT, -100, 2)
+    table.store(other, 1, EXACT, -100, 3)  # Replaces the shallow result in the second slot
+    assert table.probe(deep, 6) == (EXACT, 100, 1)
+    assert table.probe(shallow, 2) is None
+    assert table.probe(other, 1) == (EXACT, -100, 3)
+
+
+def test_new_search_frees_deeper_results():
+    table = TranspositionTable(SMALL_TABLE_MB)
+    table.store(5, 6, EXACT, 100, 1)
+    table.new_search()
+    table.store(5 + table.buckets, 2, EXACT, -100, 2)
+    assert table.probe(5, 6) is None
+    assert table.probe(5 + table.buckets, 2) == (EXACT, -100, 2)
+
+
+def test_memory_must_be_positive():
+    with pytest.raises(ValueError):
+        TranspositionTable(0)
@@ -0,0 +1,83 @@
+import threading
+import time
+from solver import Board as SolverBoard, SearchCancelled, SolutionCache, solve
+from solver.cache import DEFAULT_CACHE_PATH
+from solver.profiling import profile_name, run_profiled
+
+
+class SolveWorker(threading.Thread):
+    """Background thread class that runs one solve on its own copy of the GUI board's position, so the pygame loop
+    keeps drawing while it searches. The loop reads nodes and best_line for progress and calls cancel to stop it.
+    When done is set, sequence holds the solution (None if there is none or the search was cancelled),
+    duration the time taken and board.stats the statistics of the search. Solutions are looked up in and added to the
+    solution cache at cache_path (None for no cache), so solving the same position again is instant.
+    Returns the algorithm and whether it is still running.
+    Eg: <SolveWorker DFS running>
+    """
+    def __init__(self, gui_board, algorithm, number_of_moves, player, profile_position=None, cache_path=DEFAULT_CACHE_PATH):
+        super().__init__(daemon=True)
+        self.board = SolverBoard()
+        self.board.position.load_snapshot(gui_board.position.snapshot())
+        self.board.forcing_only = gui_board.forcing_only
+        self.board.verify_moves = gui_board.verify_moves
+        self.board.time_moves = profile_position is not None  # make/unmake are only timed when profiling
+        self.board.endgame_tables = gui_board.endgame_tables  # Read only, so the thread can share them
+        self.board.cancel_event = threading.Event()
+        self.algorithm = algorithm
+        self.number_of_moves = number_of_moves
+        self.player = player
+        self.profile_position = profile_position  # Position file name to profile the solve under, or None
+        self.cache_path = cache_path
+        self.sequence = None
+        self.cancelled = False
+        self.error = None
+        self.start_time = None
+        self.duration = None
+        self.done = threading.Event()
+
+    def __repr__(self):
+        return f"<SolveWorker {self.algorithm} {'done' if self.done.is_set() else 'running'}>"
+
+    @property
+    def nodes(self):
+        return self.board.nodes
+
+    @property
+    def best_line(self):
+        return self.board.best_line
+
+    @property
+    def elapsed(self):
+        return self.duration if self.duration is not None else time.time() - self.start_time
+
+    def run(self):
+        self.start_time = time.time()
+        try:
+            if self.profile_position is not None:
+                #Only the solve is profiled, not the pygame frames around it
+                name = profile_name(self.profile_position, self.algorithm)
+                self.sequence, stats_path, text_path = run_profiled(self.solve, name)
+                print("Profile written to " + stats_path + " and " + text_path)
+            else:
+                self.sequence = self.solve()
+        except SearchCancelled:
+            self.cancelled = True
+        except Exception as error:  # Shown by the GUI instead of killing the thread silently
+            self.error = error
+        finally:
+            self.duration = time.time() - self.start_time
+            self.done.set()
+
+    def solve(self):
+        if self.cache_path is None:
+            return solve(self.board, self.algorithm, self.number_of_moves, self.player)
+        #Opened here, sqlite connections can only be used by the thread that made them
+        cache = SolutionCache(self.cache_path)
+        try:
+            return solve(self.board, self.algorithm, self.number_of_moves, self.player, cache=cache)
+        finally:
+            cache.close()
+
+    def cancel(self):
+        #Stops the search within CANCEL_CHECK_INTERVAL moves
+        self.board.cancel_event.set()